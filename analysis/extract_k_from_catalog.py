@@ -9,14 +9,20 @@ For full analysis, need to cross-match Kirk+2016 with:
 - Literature values where published
 """
 
+import sys
 import numpy as np
 import pandas as pd
 from pathlib import Path
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+from harmonic_excess import N_SIMS, format_p, harmonic_excess
+from k_analysis import calculate_k as k_columns
+from stellar_catalogs import load_kirk2016
+
 def calculate_k(f_puls, f_orb):
     """
-    Calculate k value from frequencies
+    Calculate k values from frequencies (scalars or whole columns)
 
     n = f_puls / f_orb = 456 / k
     k = 456 / n
@@ -26,24 +32,16 @@ def calculate_k(f_puls, f_orb):
         f_orb: Orbital frequency (same units as f_puls)
 
     Returns:
-        k: Interface complexity parameter (integer)
+        k: Interface complexity parameter (integer, -1 where undefined)
         n: Observed frequency ratio
     """
-    n = f_puls / f_orb
-    k = 456 / n
-    k_int = round(k)
+    _, k_int, n = k_columns(f_puls, f_orb)
     return k_int, n
 
 def load_kirk_catalog(file_path):
-    """Load Kirk+2016 heartbeat star catalog"""
-    # Read catalog (skip header)
-    df = pd.read_csv(file_path, sep='|', skiprows=4, skipinitialspace=True)
-
-    # Clean column names
-    df.columns = df.columns.str.strip()
-
-    # Convert period to float
-    df['Per'] = pd.to_numeric(df['Per'], errors='coerce')
+    """Load Kirk+2016 heartbeat star catalog (byte layout from kirk2016_readme.txt)"""
+    catalog = load_kirk2016(file_path, Path(file_path).with_name('kirk2016_readme.txt'))
+    df = pd.DataFrame({name: catalog[name] for name in catalog.dtype.names})
 
     # Calculate orbital frequency (d^-1)
     df['f_orb'] = 1.0 / df['Per']
@@ -109,8 +107,8 @@ def main():
     print()
     print("3. Once we have f_puls for all 178 systems:")
     print()
-    print("   k_values = [round(456 / (f_puls[i] / f_orb[i])) for i in range(178)]")
-    print("   plt.hist(k_values, bins=range(1, max(k_values)+2))")
+    print("   k_values, n = calculate_k(df['f_puls'], df['f_orb'])")
+    print("   plt.hist(k_values, bins=range(1, k_values.max()+2))")
     print()
     print("4. Expected result:")
     print("   - NOT uniform distribution")
@@ -157,11 +155,15 @@ def main():
     print("Period distribution plot saved: kirk2016_period_distribution.png")
     print()
 
-    # Check for clustering around 456 days (from paper claim)
-    near_456 = df[(df['Per'] > 400) & (df['Per'] < 512)]
-    print(f"Systems with periods 400-512 days (around 456): {len(near_456)}")
-    print(f"Expected if uniform: ~{len(df) * 112 / (df['Per'].max() - df['Per'].min()):.1f}")
-    print(f"Enrichment factor: {len(near_456) / (len(df) * 112 / (df['Per'].max() - df['Per'].min())):.2f}x")
+    # Check for clustering around 456/k days (from paper claim) against a
+    # KDE background fitted to the catalog itself (same null as
+    # figure_period_histogram.py; a log-normal does not fit these periods)
+    excess = harmonic_excess(df['Per'], k_max=5, null='kde')
+    print(f"Systems near 456/k days (±2%), vs KDE background ({N_SIMS:,} null catalogs):")
+    for row in excess:
+        print(f"  456/{row['k']} = {row['period']:6.1f} d: {row['observed']} observed, "
+              f"{row['expected']:.2f} expected, enrichment {row['ratio']:.2f}x, "
+              f"{format_p(row['p_value'], N_SIMS)}")
     print()
 
     print("=" * 80)
@@ -15,49 +15,64 @@ Date: December 2025
 import numpy as np
 import pandas as pd
 from scipy.spatial.distance import pdist
-import glob
-import os
+
+from event_catalog import load_release
+from event_features import FeatureStore
+from event_index import EventIndex
+from event_sampling import pandas_rows
 
 # TFA Prediction
 TFA_PREDICTED_D2 = 1.45
 TFA_PREDICTED_ERROR = 0.10
 
-def load_all_events(events_dir='events'):
-    """Load all events from all seasons."""
-    all_events = []
-
-    for csv_file in sorted(glob.glob(os.path.join(events_dir, '*.csv'))):
-        season = os.path.basename(csv_file).replace('_exp.csv', '').replace('_exp-1.csv', '')
-        print(f"Loading {season}...", end=' ')
-
-        df = pd.read_csv(csv_file, comment='#', sep=r'\s+',
-                        names=['MJD', 'log10E', 'AngErr', 'RA', 'Dec', 'Azimuth', 'Zenith'])
-        df['season'] = season
-        all_events.append(df)
-        print(f"{len(df)} events")
-
-    combined = pd.concat(all_events, ignore_index=True)
-    print(f"\nTotal: {len(combined):,} events")
-    return combined
-
-def prepare_features(df, sample_size=10000):
-    """Prepare normalized features for D2 calculation."""
-    # Sample if too large (for computational efficiency)
-    if len(df) > sample_size:
-        df_sample = df.sample(n=sample_size, random_state=42)
-        print(f"Sampled {sample_size:,} events for analysis")
-    else:
-        df_sample = df
+# Random seed for the subsample and the bootstrap
+SEED = 42
 
-    # Features: log10(E), sin(Dec)
-    log_e = df_sample['log10E'].values
-    sin_dec = np.sin(np.radians(df_sample['Dec'].values))
+def events_frame(catalog):
+    """DataFrame view of a ps10yr EventCatalog with the season CSV column names."""
+    df = pd.DataFrame({name: catalog.events[name] for name in
+                       ['MJD', 'log10E', 'AngErr', 'RA', 'Dec', 'Azimuth', 'Zenith']})
+    df['season'] = pd.Categorical.from_codes(catalog.events['season'], catalog.seasons)
 
-    # Normalize to [0, 1]
-    log_e_norm = (log_e - log_e.min()) / (log_e.max() - log_e.min())
-    sin_dec_norm = (sin_dec - sin_dec.min()) / (sin_dec.max() - sin_dec.min())
+    for season, count in df['season'].value_counts(sort=False).items():
+        print(f"Loading {season}... {count} events")
+
+    print(f"\nTotal: {len(df):,} events")
+    return df
+
+def load_all_events(events_dir='events'):
+    """Load all events from all seasons (via the cached event catalog)."""
+    return events_frame(load_release('ps10yr', events_dir))
+
+def prepare_features(events, sample_size=10000, indices=None, normalize='subset', seed=SEED,
+                     sampler=pandas_rows):
+    """
+    Prepare normalized [log10(E), sin(Dec)] features for D2 calculation.
+
+    ``events`` is a FeatureStore (precomputed, cached columns) or a DataFrame
+    with log10E and Dec columns. ``indices`` restricts the calculation to
+    those rows (e.g. from an EventIndex query or a stratified draw from
+    event_sampling); the subsample is drawn on the index array with an
+    explicit ``seed``, so only the sampled feature block is allocated.
+    ``sampler`` defaults to pandas_rows, the df.sample(random_state=42) draw
+    behind the published numbers; event_sampling.uniform_rows draws in
+    O(sample_size) memory but selects different events.
+
+    ``normalize='subset'`` scales by the sampled rows' own min/max (the
+    original behaviour); 'global' uses the full-catalog scale so energy and
+    declination bins are directly comparable.
+    """
+    store = events if isinstance(events, FeatureStore) else FeatureStore(events, ('log10E', 'sin_dec'))
+
+    if indices is None:
+        indices = len(store)
+    n_available = indices if np.ndim(indices) == 0 else len(indices)
+
+    rows = sampler(indices, sample_size, seed)
+    if n_available > sample_size:
+        print(f"Sampled {sample_size:,} events for analysis")
 
-    return np.column_stack([log_e_norm, sin_dec_norm])
+    return store.features(rows, normalize=normalize)
 
 def grassberger_procaccia(features, n_radii=30):
     """Calculate D2 using Grassberger-Procaccia algorithm."""
@@ -88,15 +103,16 @@ def grassberger_procaccia(features, n_radii=30):
 
     return D2, error
 
-def bootstrap_d2(features, n_bootstrap=30):
+def bootstrap_d2(features, n_bootstrap=30, seed=SEED):
     """Bootstrap estimation of D2 uncertainty."""
     d2_samples = []
     N = len(features)
+    rng = np.random.default_rng(seed)
 
     for i in range(n_bootstrap):
         if (i + 1) % 10 == 0:
             print(f"  Bootstrap {i+1}/{n_bootstrap}")
-        indices = np.random.choice(N, size=N, replace=True)
+        indices = rng.integers(0, N, size=N)
         sample = features[indices]
         d2, _ = grassberger_procaccia(sample)
         if not np.isnan(d2):
@@ -104,58 +120,66 @@ def bootstrap_d2(features, n_bootstrap=30):
 
     return np.mean(d2_samples), np.std(d2_samples)
 
-def analyze_by_energy(df, bins=[(2, 3), (3, 4), (4, 5), (5, 7)]):
+def analyze_by_energy(df, bins=[(2, 3), (3, 4), (4, 5), (5, 7)], index=None, store=None,
+                      normalize='subset'):
     """Analyze D2 by energy range."""
+    if index is None:
+        index = EventIndex(df, ('log10E',))
+    if store is None:
+        store = FeatureStore(df, ('log10E', 'sin_dec'))
     results = []
 
     for e_min, e_max in bins:
-        mask = (df['log10E'] >= e_min) & (df['log10E'] < e_max)
-        subset = df[mask]
+        rows = index.range('log10E', e_min, e_max)
 
-        if len(subset) < 1000:
-            print(f"  log10(E) {e_min}-{e_max}: Insufficient events ({len(subset)})")
+        if len(rows) < 1000:
+            print(f"  log10(E) {e_min}-{e_max}: Insufficient events ({len(rows)})")
             continue
 
-        features = prepare_features(subset, sample_size=5000)
+        features = prepare_features(store, sample_size=5000, indices=rows, normalize=normalize)
         d2, err = grassberger_procaccia(features)
 
         e_gev_min = 10**e_min
         e_gev_max = 10**e_max
-        print(f"  {e_gev_min/1e3:.0f}-{e_gev_max/1e3:.0f} TeV: D2 = {d2:.3f} +/- {err:.3f} (N={len(subset):,})")
+        print(f"  {e_gev_min/1e3:.0f}-{e_gev_max/1e3:.0f} TeV: D2 = {d2:.3f} +/- {err:.3f} (N={len(rows):,})")
 
         results.append({
             'E_min_TeV': e_gev_min/1e3,
             'E_max_TeV': e_gev_max/1e3,
             'D2': d2,
             'error': err,
-            'N': len(subset)
+            'N': len(rows)
         })
 
     return results
 
-def analyze_by_declination(df, bins=[(-90, -30), (-30, 0), (0, 30), (30, 90)]):
+def analyze_by_declination(df, bins=[(-90, -30), (-30, 0), (0, 30), (30, 90)], index=None,
+                           store=None, normalize='subset'):
     """Analyze D2 by declination band."""
+    if index is None:
+        index = EventIndex(df, ('Dec',))
+    if store is None:
+        store = FeatureStore(df, ('log10E', 'sin_dec'))
     results = []
 
     for dec_min, dec_max in bins:
-        mask = (df['Dec'] >= dec_min) & (df['Dec'] < dec_max)
-        subset = df[mask]
+        rows = index.range('Dec', dec_min, dec_max)
 
-        if len(subset) < 1000:
-            print(f"  Dec {dec_min} to {dec_max}: Insufficient events ({len(subset)})")
+        if len(rows) < 1000:
+            print(f"  Dec {dec_min} to {dec_max}: Insufficient events ({len(rows)})")
             continue
 
-        features = prepare_features(subset, sample_size=5000)
+        features = prepare_features(store, sample_size=5000, indices=rows, normalize=normalize)
         d2, err = grassberger_procaccia(features)
 
-        print(f"  Dec [{dec_min}, {dec_max}]: D2 = {d2:.3f} +/- {err:.3f} (N={len(subset):,})")
+        print(f"  Dec [{dec_min}, {dec_max}]: D2 = {d2:.3f} +/- {err:.3f} (N={len(rows):,})")
 
         results.append({
             'Dec_min': dec_min,
             'Dec_max': dec_max,
             'D2': d2,
             'error': err,
-            'N': len(subset)
+            'N': len(rows)
         })
 
     return results
@@ -166,8 +190,11 @@ def main():
     print("=" * 70)
     print()
 
-    # Load data
-    df = load_all_events()
+    # Load data; indexes and feature columns are cached with the catalog
+    catalog = load_release('ps10yr', 'events')
+    df = events_frame(catalog)
+    index = EventIndex.for_catalog(catalog)
+    store = FeatureStore.for_catalog(catalog)
 
     print(f"\nEnergy range: 10^{df['log10E'].min():.1f} - 10^{df['log10E'].max():.1f} GeV")
     print(f"             ({10**df['log10E'].min()/1e3:.1f} TeV - {10**df['log10E'].max()/1e3:.0f} TeV)")
@@ -179,13 +206,13 @@ def main():
     print("PRIMARY D2 CALCULATION (50k sample)")
     print("-" * 70)
 
-    features = prepare_features(df, sample_size=50000)
+    features = prepare_features(store, sample_size=50000, seed=SEED)
     D2, fit_error = grassberger_procaccia(features)
     print(f"\nDirect fit: D2 = {D2:.3f} +/- {fit_error:.3f}")
 
     # Bootstrap
     print("\nRunning bootstrap (100 iterations)...")
-    d2_mean, d2_std = bootstrap_d2(features, n_bootstrap=100)
+    d2_mean, d2_std = bootstrap_d2(features, n_bootstrap=100, seed=SEED)
     print(f"Bootstrap:  D2 = {d2_mean:.3f} +/- {d2_std:.3f}")
 
     # Comparison
@@ -221,14 +248,14 @@ def main():
     print("-" * 70)
     print("ENERGY STRATIFIED ANALYSIS")
     print("-" * 70)
-    energy_results = analyze_by_energy(df)
+    energy_results = analyze_by_energy(df, index=index, store=store)
 
     # Declination bands
     print()
     print("-" * 70)
     print("DECLINATION BAND ANALYSIS")
     print("-" * 70)
-    dec_results = analyze_by_declination(df)
+    dec_results = analyze_by_declination(df, index=index, store=store)
 
     # Summary
     print()
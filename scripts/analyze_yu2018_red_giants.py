@@ -12,6 +12,10 @@ from scipy.optimize import curve_fit
 import json
 from datetime import datetime
 
+from k_analysis import harmonic_window_counts, k_from_ratio
+from k_density import k_density
+from stellar_catalogs import load_yu2018
+
 # Output file for results
 RESULTS_FILE = '/mnt/user-data/outputs/analysis_results.json'
 SUMMARY_FILE = '/mnt/user-data/outputs/analysis_summary.txt'
@@ -44,44 +48,20 @@ try:
     # LOAD DATA
     log("\n[1/6] Loading data...")
     
-    data1 = []
-    with open('/home/claude/table1.dat', 'r') as f:
-        for line in f:
-            kic = int(line[1:9])
-            numax = float(line[28:34])
-            delnu = float(line[41:47])
-            data1.append([kic, numax, delnu])
-    
-    df1 = pd.DataFrame(data1, columns=['KIC', 'numax', 'Delnu'])
-    log(f"✓ Loaded {len(df1)} stars from table1.dat")
-    save_result('n_stars_table1', len(df1))
-    
-    data2 = []
-    with open('/home/claude/table2.dat', 'r') as f:
-        for line in f:
-            kic = int(line[0:8])
-            try:
-                radius = float(line[51:56])
-                mass = float(line[41:45])
-                phase = int(line[105]) if len(line) > 105 and line[105].strip() else -1
-            except:
-                radius = np.nan
-                mass = np.nan
-                phase = -1
-            data2.append([kic, mass, radius, phase])
-    
-    df2 = pd.DataFrame(data2, columns=['KIC', 'Mass', 'Radius', 'Phase'])
-    log(f"✓ Loaded {len(df2)} stars from table2.dat")
-    save_result('n_stars_table2', len(df2))
-    
-    df = pd.merge(df1, df2, on='KIC')
+    stars, n_rows = load_yu2018('/home/claude/table1.dat', '/home/claude/table2.dat')
+    log(f"✓ Loaded {n_rows['table1']} stars from table1.dat")
+    save_result('n_stars_table1', n_rows['table1'])
+    log(f"✓ Loaded {n_rows['table2']} stars from table2.dat")
+    save_result('n_stars_table2', n_rows['table2'])
+
+    df = pd.DataFrame({name: stars[name] for name in stars.dtype.names})
     log(f"✓ Merged: {len(df)} stars total")
     save_result('n_stars_merged', len(df))
     
     # CALCULATE k
     log("\n[2/6] Calculating k values...")
     df['n_ratio'] = df['numax'] / df['Delnu']
-    df['k_inferred'] = 456 / df['n_ratio']
+    df['k_inferred'] = k_from_ratio(df['n_ratio'])
     df = df[df['k_inferred'].notna() & (df['k_inferred'] > 0) & (df['k_inferred'] < 200)]
     
     k_stats = {
@@ -139,11 +119,10 @@ try:
     log("="*70)
     
     harmonic_peaks = {}
-    for n in range(6, 13):
-        k_pred = 456 / n
+    windows = harmonic_window_counts(df['k_inferred'].to_numpy(), range(6, 13), half_width=2)
+    for n, k_pred, nearby in zip(windows['n'], windows['k_pred'], windows['count']):
         if 30 < k_pred < 80:
-            nearby = int(np.sum((df['k_inferred'] >= k_pred - 2) & (df['k_inferred'] <= k_pred + 2)))
-            harmonic_peaks[f'n_{n}'] = {'k_pred': k_pred, 'count': nearby}
+            harmonic_peaks[f'n_{n}'] = {'k_pred': k_pred, 'count': int(nearby)}
             log(f"  n={n:2d}: k={k_pred:5.1f} → {nearby:5d} stars within ±2")
     
     save_result('harmonic_peaks', harmonic_peaks)
@@ -161,6 +140,19 @@ try:
     
     log(f"\nUniformity test (χ²): {chi_squared:.1f}")
     log(f"  {'✓ Strong clustering' if chi_squared > 100 else '○ Weak clustering'}")
+
+    # Bin-free check: KDE peaks (cross-validated bandwidth, bootstrap bands) vs 456/n
+    kde = k_density(df['k_inferred'], k_range=(30, 80))
+    kde_peaks = kde.peaks[kde.peaks['supported']]
+    save_result('kde_peaks', {
+        'bandwidth': kde.bandwidth,
+        'peaks': kde_peaks[['k_peak', 'n', 'k_pred', 'offset']].to_dict('records'),
+    })
+
+    log(f"\nKDE peaks (h = {kde.bandwidth:.2f}, outside the 95% bootstrap band):")
+    for peak in kde_peaks.itertuples():
+        log(f"  k={peak.k_peak:5.1f} → nearest 456/{peak.n:d} = {peak.k_pred:5.1f} "
+            f"(offset {peak.offset:+.2f})")
     
     # TEST 3: EVOLUTION CORRELATION
     log("\n" + "="*70)
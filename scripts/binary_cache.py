@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Binary Cache for Parsed Catalogs
+================================
+
+Parsed tables are stored as a single ``.npy`` array (structured or plain)
+next to their source, with a small JSON sidecar holding the source
+signature and any schema metadata. A cache is reused only while the
+signature still matches, and is opened memory-mapped so repeated runs
+skip the text parsing entirely.
+
+Cache layout for a source ``events/`` tagged ``ps10yr``:
+    events.ps10yr.cache.npy     array data
+    events.ps10yr.cache.json    {"signature": ..., "meta": ...}
+
+Author: Jason King / TFA Framework
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+CACHE_SUFFIX = '.cache.npy'
+META_SUFFIX = '.cache.json'
+
+
+def _source_files(path: Path):
+    """List the files that make up a source (a file, or every file in a directory)."""
+    if path.is_dir():
+        return sorted(p for p in path.rglob('*') if p.is_file() and not p.name.endswith((CACHE_SUFFIX, META_SUFFIX)))
+    return [path]
+
+
+def source_signature(*sources) -> Dict[str, list]:
+    """
+    Describe the current state of one or more source files or directories.
+
+    The signature records size and modification time (ns) of every file, which
+    is enough to notice re-downloads and edits without reading the data.
+
+    Args:
+        sources: File or directory paths
+
+    Returns:
+        Dict mapping file path -> [size, mtime_ns]
+    """
+    signature = {}
+    for source in sources:
+        for f in _source_files(Path(source)):
+            st = f.stat()
+            signature[str(f)] = [st.st_size, st.st_mtime_ns]
+    return signature
+
+
+def cache_path_for(source, tag: str) -> Path:
+    """Cache file path next to ``source`` for a given tag."""
+    source = Path(source)
+    return source.parent / f"{source.name}.{tag}{CACHE_SUFFIX}"
+
+
+def _meta_path(cache_path: Path) -> Path:
+    return cache_path.with_name(cache_path.name[:-len(CACHE_SUFFIX)] + META_SUFFIX)
+
+
+def read_sidecar(cache_path) -> Optional[dict]:
+    """Stored {'signature': ..., 'meta': ...} of a cache, None if missing or unreadable."""
+    try:
+        with open(_meta_path(Path(cache_path))) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def update_signature(cache_path, signature: dict):
+    """Re-stamp an existing cache with a new signature (content known unchanged)."""
+    cache_path = Path(cache_path)
+    stored = read_sidecar(cache_path) or {}
+    _write_sidecar(_meta_path(cache_path), signature, stored.get('meta'))
+
+
+def _write_sidecar(meta_path: Path, signature: dict, meta: Optional[dict]):
+    tmp = meta_path.with_name(meta_path.name + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump({'signature': signature, 'meta': meta or {}}, f, indent=2)
+    os.replace(tmp, meta_path)
+
+
+def load_array(cache_path, signature: dict, mmap: bool = True) -> Optional[Tuple[np.ndarray, dict]]:
+    """
+    Load a cached array if it exists and matches ``signature``.
+
+    Args:
+        cache_path: Path returned by cache_path_for()
+        signature: Current source signature (see source_signature())
+        mmap: Open the array memory-mapped (read-only)
+
+    Returns:
+        (array, meta) on a cache hit, None on a miss or a stale cache
+    """
+    cache_path = Path(cache_path)
+    stored = read_sidecar(cache_path)
+    if stored is None or not cache_path.exists():
+        return None
+
+    if stored.get('signature') != signature:
+        return None
+
+    array = np.load(cache_path, mmap_mode='r' if mmap else None, allow_pickle=False)
+    return array, stored.get('meta', {})
+
+
+def save_array(cache_path, array: np.ndarray, signature: dict, meta: Optional[dict] = None):
+    """
+    Write ``array`` and its sidecar atomically.
+
+    The array is written first and the sidecar last, so an interrupted write
+    leaves a cache that load_array() treats as stale rather than corrupt.
+
+    Args:
+        cache_path: Path returned by cache_path_for()
+        array: Array to store (no object dtypes)
+        signature: Source signature the array was built from
+        meta: Extra JSON-serializable schema metadata
+    """
+    cache_path = Path(cache_path)
+    meta_path = _meta_path(cache_path)
+
+    if meta_path.exists():
+        meta_path.unlink()
+
+    tmp = cache_path.with_name(cache_path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        np.save(f, np.ascontiguousarray(array), allow_pickle=False)
+    os.replace(tmp, cache_path)
+
+    _write_sidecar(meta_path, signature, meta)
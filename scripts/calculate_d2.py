@@ -16,8 +16,13 @@ import pandas as pd
 from scipy.spatial.distance import cdist
 from sklearn.cluster import DBSCAN
 import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+from dataclasses import dataclass
 from typing import Tuple, List
 
+from event_sampling import pandas_rows
+from grid_dbscan import cluster_sizes, dbscan_sweep, grid_dbscan
+
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
@@ -42,9 +47,25 @@ ENERGY_BINS = [
 # Bootstrap parameters
 N_BOOTSTRAP = 1000
 
+# Random seed for subsampling and bootstrap resampling
+SEED = 42
+
 # Clustering parameters
 DBSCAN_EPS = 0.1
 DBSCAN_MIN_SAMPLES = 5
+DBSCAN_METHOD = 'grid'   # 'grid' (grid_dbscan.py) or 'sklearn'
+
+# Sensitivity sweep of the cluster count (one neighbour graph at max eps)
+DBSCAN_SWEEP_EPS = np.linspace(0.05, 0.15, 11)
+DBSCAN_SWEEP_MIN_SAMPLES = np.arange(3, 11)
+
+# Event distribution plot: density image at output resolution, markers only
+# for events in OUTLIER_BLOCK-pixel tiles holding <= OUTLIER_MAX_COUNT events
+PLOT_DPI = 150
+DENSITY_CHUNK = 1 << 20
+OUTLIER_BLOCK = 16
+DENSITY_EVENTS_PER_BIN = 5.0  # Mean events per bin; smaller samples get bins coarser than a pixel
+OUTLIER_MAX_COUNT = 2
 
 # ============================================================================
 # CORE FUNCTIONS
@@ -78,12 +99,39 @@ def load_icecube_data(filepath: str) -> pd.DataFrame:
     return data
 
 
+@dataclass
+class D2Result:
+    """Correlation integral and log-log fit behind one D₂ estimate."""
+    d2: float                   # Fitted slope
+    error: float                # Standard error from the fit residuals
+    radii: np.ndarray           # Radii r
+    counts: np.ndarray          # Ordered pairs (self-pairs included) with distance < r
+    n_events: int               # Events in the sample, C(r) = counts / n_events²
+    fit_window: Tuple[int, int] # [start, stop) indices of radii used in the fit
+    coefficients: np.ndarray    # np.polyfit [slope, intercept] of log C vs log r
+
+    @property
+    def correlation_integral(self) -> np.ndarray:
+        """C(r) at each radius."""
+        return self.counts / self.n_events**2
+
+    @property
+    def fit_radii(self) -> np.ndarray:
+        return self.radii[self.fit_window[0]:self.fit_window[1]]
+
+    def fit_line(self, r: np.ndarray = None) -> np.ndarray:
+        """Fitted power law C(r) = exp(intercept) r^D₂ (at the fit radii by default)."""
+        r = self.fit_radii if r is None else r
+        return np.exp(self.coefficients[1]) * r**self.coefficients[0]
+
+
 def calculate_correlation_dimension(events: np.ndarray,
                                     sample_size: int = SAMPLE_SIZE,
                                     r_min: float = R_MIN,
                                     r_max: float = R_MAX,
                                     n_radii: int = N_RADII,
-                                    fit_exclude: int = FIT_EXCLUDE) -> Tuple[float, float]:
+                                    fit_exclude: int = FIT_EXCLUDE,
+                                    seed: int = SEED) -> D2Result:
     """
     Calculate correlation dimension D₂ using Grassberger-Procaccia algorithm.
 
@@ -99,15 +147,16 @@ def calculate_correlation_dimension(events: np.ndarray,
         r_max: Maximum radius
         n_radii: Number of radii to sample
         fit_exclude: Number of points to exclude from fit (avoid saturation)
+        seed: Random seed for the subsample
 
     Returns:
-        (D₂, std_error): Correlation dimension and standard error
+        D2Result with D₂, its standard error, C(r) and the fit
     """
     N = min(len(events), sample_size)
 
     # Subsample if necessary
     if len(events) > sample_size:
-        indices = np.random.choice(len(events), sample_size, replace=False)
+        indices = pandas_rows(len(events), sample_size, seed)
         sample = events[indices]
     else:
         sample = events
@@ -117,11 +166,13 @@ def calculate_correlation_dimension(events: np.ndarray,
 
     # Correlation integral for each radius
     r_values = np.logspace(np.log10(r_min), np.log10(r_max), n_radii)
-    C_r = np.array([np.sum(distances < r) / N**2 for r in r_values])
+    counts = np.array([np.count_nonzero(distances < r) for r in r_values])
+    C_r = counts / N**2
 
     # Log-log fit (exclude saturation region)
-    log_r = np.log(r_values[:-fit_exclude])
-    log_C = np.log(C_r[:-fit_exclude] + 1e-10)  # Avoid log(0)
+    fit_window = (0, n_radii - fit_exclude)
+    log_r = np.log(r_values[fit_window[0]:fit_window[1]])
+    log_C = np.log(C_r[fit_window[0]:fit_window[1]] + 1e-10)  # Avoid log(0)
 
     # Linear regression: log C = D₂ × log r + const
     coeffs, residuals, _, _, _ = np.polyfit(log_r, log_C, 1, full=True)
@@ -130,30 +181,33 @@ def calculate_correlation_dimension(events: np.ndarray,
     # Estimate error from residuals
     std_error = np.sqrt(residuals[0] / (len(log_r) - 2)) if len(residuals) > 0 else 0.05
 
-    return D2, std_error
+    return D2Result(D2, std_error, r_values, counts, N, fit_window, coeffs)
 
 
-def calculate_d2_bootstrap(events: np.ndarray, n_bootstrap: int = N_BOOTSTRAP) -> Tuple[float, float]:
+def calculate_d2_bootstrap(events: np.ndarray, n_bootstrap: int = N_BOOTSTRAP,
+                           seed: int = SEED) -> Tuple[float, float]:
     """
     Calculate D₂ with bootstrap error estimation.
 
     Args:
         events: N×2 array of events
         n_bootstrap: Number of bootstrap resamples
+        seed: Random seed for the resampling
 
     Returns:
         (mean_D₂, std_D₂): Mean and standard deviation over bootstrap samples
     """
     d2_samples = []
+    rng = np.random.default_rng(seed)
 
     for _ in range(n_bootstrap):
         # Resample with replacement
-        indices = np.random.choice(len(events), len(events), replace=True)
+        indices = rng.integers(0, len(events), size=len(events))
         resampled = events[indices]
 
         # Calculate D₂
-        d2, _ = calculate_correlation_dimension(resampled)
-        d2_samples.append(d2)
+        result = calculate_correlation_dimension(resampled, seed=int(rng.integers(2**32)))
+        d2_samples.append(result.d2)
 
     return np.mean(d2_samples), np.std(d2_samples)
 
@@ -182,7 +236,8 @@ def energy_stratified_d2(data: pd.DataFrame, bins: List[Tuple]) -> pd.DataFrame:
 
         # Calculate D₂
         events = subset[['Log_E', 'Cos_Zenith']].values
-        d2, error = calculate_correlation_dimension(events)
+        result = calculate_correlation_dimension(events)
+        d2, error = result.d2, result.error
 
         results.append({
             'Energy_Range': label,
@@ -240,7 +295,8 @@ def angular_correlation(data: pd.DataFrame) -> Tuple[float, float]:
 
 
 def cluster_analysis(events: np.ndarray, eps: float = DBSCAN_EPS,
-                    min_samples: int = DBSCAN_MIN_SAMPLES) -> Tuple[int, np.ndarray]:
+                    min_samples: int = DBSCAN_MIN_SAMPLES,
+                    method: str = DBSCAN_METHOD) -> Tuple[int, np.ndarray]:
     """
     Perform DBSCAN clustering to identify event clusters.
 
@@ -248,59 +304,172 @@ def cluster_analysis(events: np.ndarray, eps: float = DBSCAN_EPS,
         events: N×2 array
         eps: DBSCAN neighborhood radius
         min_samples: Minimum points per cluster
+        method: 'grid' (eps-grid DBSCAN, scales to the full sample) or
+                'sklearn' (sklearn.cluster.DBSCAN); both give identical labels
 
     Returns:
         (n_clusters, cluster_sizes): Number of clusters and size distribution
     """
-    db = DBSCAN(eps=eps, min_samples=min_samples).fit(events)
-    labels = db.labels_
+    if method == 'grid':
+        labels = grid_dbscan(events, eps, min_samples)
+    elif method == 'sklearn':
+        labels = DBSCAN(eps=eps, min_samples=min_samples).fit(events).labels_
+    else:
+        raise ValueError(f"Unknown clustering method '{method}'")
+
+    # Count clusters and their sizes (excluding noise label -1)
+    return cluster_sizes(labels)
 
-    # Count clusters (excluding noise label -1)
-    unique_labels = set(labels)
-    n_clusters = len(unique_labels) - (1 if -1 in unique_labels else 0)
 
-    # Cluster size distribution
-    cluster_sizes = [np.sum(labels == label) for label in unique_labels if label != -1]
+def cluster_sensitivity(events: np.ndarray, eps_values=DBSCAN_SWEEP_EPS,
+                        min_samples_values=DBSCAN_SWEEP_MIN_SAMPLES) -> np.ndarray:
+    """
+    Cluster count over a grid of DBSCAN parameters.
 
-    return n_clusters, np.array(cluster_sizes)
+    The radius-neighbour graph is built once at the largest eps and every
+    grid point is read off it; counts equal separate cluster_analysis runs.
+    Samples too dense for that graph (more than MAX_SWEEP_PAIRS candidate
+    pairs) are swept with one grid_dbscan run per grid point instead.
+
+    Returns:
+        len(eps_values) × len(min_samples_values) array of cluster counts
+    """
+    return dbscan_sweep(events, eps_values, min_samples_values)
 
 
 # ============================================================================
 # VISUALIZATION
 # ============================================================================
 
-def plot_event_distribution(data: pd.DataFrame, output_file: str = 'icecube_distribution.png'):
-    """Plot event distribution in (log E, cos θ) space."""
+def _pixel_index(x: np.ndarray, y: np.ndarray, extent: Tuple[float, float, float, float],
+                 shape: Tuple[int, int]) -> np.ndarray:
+    """Flat pixel index (row-major, y rows) of each point."""
+    x0, x1, y0, y1 = extent
+    ny, nx = shape
+    ix = np.clip(((x - x0) * (nx / (x1 - x0))).astype(np.int64), 0, nx - 1)
+    iy = np.clip(((y - y0) * (ny / (y1 - y0))).astype(np.int64), 0, ny - 1)
+    return iy * nx + ix
+
+
+def density_image(x: np.ndarray, y: np.ndarray, shape: Tuple[int, int],
+                  extent: Tuple[float, float, float, float],
+                  chunk: int = DENSITY_CHUNK) -> np.ndarray:
+    """
+    Count events per pixel of an ny × nx image covering extent (x0, x1, y0, y1).
+
+    Points are binned in chunks, so memory stays O(chunk + pixels) and the
+    image handed to matplotlib has the same size for any number of events.
+    """
+    counts = np.zeros(shape[0] * shape[1], dtype=np.int64)
+    for i in range(0, len(x), chunk):
+        counts += np.bincount(_pixel_index(x[i:i + chunk], y[i:i + chunk], extent, shape),
+                              minlength=counts.size)
+    return counts.reshape(shape)
+
+
+def sparse_points(x: np.ndarray, y: np.ndarray, counts: np.ndarray,
+                  extent: Tuple[float, float, float, float], block: int = OUTLIER_BLOCK,
+                  max_count: int = OUTLIER_MAX_COUNT,
+                  chunk: int = DENSITY_CHUNK) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Events in near-empty regions: block × block pixel tiles of the density
+    image holding at most max_count events (so at most max_count per tile).
+    """
+    ny, nx = counts.shape
+    tiles = np.add.reduceat(np.add.reduceat(counts, np.arange(0, ny, block), axis=0),
+                            np.arange(0, nx, block), axis=1)
+    sparse = np.repeat(np.repeat(tiles <= max_count, block, axis=0), block, axis=1)[:ny, :nx].ravel()
+    keep = [np.flatnonzero(sparse[_pixel_index(x[i:i + chunk], y[i:i + chunk], extent, counts.shape)]) + i
+            for i in range(0, len(x), chunk)]
+    keep = np.concatenate(keep) if keep else np.empty(0, dtype=np.int64)
+    return x[keep], y[keep]
+
+
+def plot_event_distribution(data: pd.DataFrame, output_file: str = 'icecube_distribution.png',
+                            show_outliers: bool = True):
+    """
+    Plot event distribution in (log E, cos θ) space.
+
+    Events are drawn as a log-scaled density image with one bin per output
+    pixel, so render time and file size do not grow with the number of
+    events. Samples too small to put DENSITY_EVENTS_PER_BIN events in an
+    average pixel get square bins of several pixels instead (3,000 events:
+    ~40 px bins). Outlier tiles stay at least OUTLIER_BLOCK pixels wide.
+    With show_outliers, events in near-empty regions are overlaid as
+    markers so isolated events stay visible.
+    """
+    x = data['Log_E'].to_numpy(dtype=float)
+    y = data['Cos_Zenith'].to_numpy(dtype=float)
+    finite = np.isfinite(x) & np.isfinite(y)
+    if not finite.all():
+        x, y = x[finite], y[finite]
+
+    fig, ax = plt.subplots(figsize=(10, 7))
+    ax.set_xlabel('Log₁₀(Energy [GeV])')
+    ax.set_ylabel('Cos(Zenith)')
+    ax.set_title('IceCube Neutrino Event Distribution')
+    ax.grid(alpha=0.3)
+    if len(x) == 0:
+        fig.savefig(output_file, dpi=PLOT_DPI)
+        plt.close(fig)
+        print(f"Saved: {output_file}")
+        return
+
+    x0, x1 = x.min(), x.max()
+    y0, y1 = y.min(), y.max()
+    extent = (x0, x1 if x1 > x0 else x0 + 1.0, y0, y1 if y1 > y0 else y0 + 1.0)
+
+    # One histogram bin per saved pixel of the axes (after colorbar and layout),
+    # or coarser bins when there are fewer events than pixels
+    mesh = ax.imshow(np.ones((1, 1)), extent=extent, origin='lower', aspect='auto',
+                     norm=LogNorm(vmin=1, vmax=2), cmap='viridis', interpolation='nearest')
+    fig.colorbar(mesh, ax=ax, label='Events per bin')
+    fig.tight_layout()
+    box = ax.get_window_extent()
+    ny, nx = box.height / fig.dpi * PLOT_DPI, box.width / fig.dpi * PLOT_DPI
+    side = max(1.0, np.sqrt(nx * ny * DENSITY_EVENTS_PER_BIN / len(x)))
+    shape = (max(1, int(ny / side)), max(1, int(nx / side)))
+
+    counts = density_image(x, y, shape, extent)
+    mesh.set_data(np.ma.masked_equal(counts, 0))
+    mesh.set_norm(LogNorm(vmin=1, vmax=max(int(counts.max()), 2)))
+
+    if show_outliers:
+        sx, sy = sparse_points(x, y, counts, extent, block=int(np.ceil(OUTLIER_BLOCK / side)))
+        ax.scatter(sx, sy, s=4, c='black', marker='.', linewidths=0,
+                   label='Isolated events')
+        ax.legend(loc='upper right')
+
+    fig.savefig(output_file, dpi=PLOT_DPI)
+    plt.close(fig)
+    print(f"Saved: {output_file}")
+
+
+def plot_cluster_sensitivity(counts: np.ndarray, eps_values=DBSCAN_SWEEP_EPS,
+                             min_samples_values=DBSCAN_SWEEP_MIN_SAMPLES,
+                             output_file: str = 'cluster_sensitivity.png'):
+    """Plot the cluster-count surface with the N/4 = 114 contour."""
     plt.figure(figsize=(10, 7))
-    plt.scatter(data['Log_E'], data['Cos_Zenith'], alpha=0.3, s=1)
-    plt.xlabel('Log₁₀(Energy [GeV])')
-    plt.ylabel('Cos(Zenith)')
-    plt.title('IceCube Neutrino Event Distribution')
-    plt.grid(alpha=0.3)
+    mesh = plt.pcolormesh(min_samples_values, eps_values, counts, shading='nearest', cmap='viridis')
+    plt.colorbar(mesh, label='Number of clusters')
+    if counts.min() < 114 < counts.max():
+        plt.contour(min_samples_values, eps_values, counts, levels=[114], colors='red')
+    plt.plot(DBSCAN_MIN_SAMPLES, DBSCAN_EPS, 'r*', markersize=12, label='Default parameters')
+    plt.xlabel('min_samples')
+    plt.ylabel('eps')
+    plt.title('DBSCAN Cluster Count Sensitivity (red: N/4 = 114)')
+    plt.legend()
     plt.tight_layout()
     plt.savefig(output_file, dpi=150)
     print(f"Saved: {output_file}")
 
 
-def plot_correlation_integral(events: np.ndarray, output_file: str = 'correlation_integral.png'):
-    """Plot correlation integral C(r) vs r."""
-    N = min(len(events), SAMPLE_SIZE)
-    sample = events[np.random.choice(len(events), N, replace=False)] if len(events) > N else events
-
-    distances = cdist(sample, sample, metric='euclidean')
-    r_values = np.logspace(np.log10(R_MIN), np.log10(R_MAX), N_RADII)
-    C_r = np.array([np.sum(distances < r) / N**2 for r in r_values])
-
-    # Fit
-    log_r = np.log(r_values[:-FIT_EXCLUDE])
-    log_C = np.log(C_r[:-FIT_EXCLUDE] + 1e-10)
-    coeffs = np.polyfit(log_r, log_C, 1)
-    D2 = coeffs[0]
-
+def plot_correlation_integral(result: D2Result, output_file: str = 'correlation_integral.png'):
+    """Plot correlation integral C(r) vs r and the fit of a D2Result."""
     plt.figure(figsize=(10, 7))
-    plt.loglog(r_values, C_r, 'o', label='Data', markersize=4)
-    plt.loglog(r_values[:-FIT_EXCLUDE], np.exp(coeffs[1]) * r_values[:-FIT_EXCLUDE]**D2,
-               'r--', label=f'Fit: D₂ = {D2:.2f}')
+    plt.loglog(result.radii, result.correlation_integral, 'o', label='Data', markersize=4)
+    plt.loglog(result.fit_radii, result.fit_line(),
+               'r--', label=f'Fit: D₂ = {result.d2:.2f}')
     plt.xlabel('Radius r')
     plt.ylabel('Correlation Integral C(r)')
     plt.title('Grassberger-Procaccia Correlation Dimension')
@@ -332,7 +501,8 @@ def main():
 
     # Primary D₂ calculation
     print("Calculating total D₂...")
-    D2, D2_error = calculate_correlation_dimension(events)
+    d2_result = calculate_correlation_dimension(events)
+    D2, D2_error = d2_result.d2, d2_result.error
     print(f"Total D₂ = {D2:.2f} ± {D2_error:.2f}")
     print(f"DFA Prediction: D₂ = 1.45 ± 0.10")
     print(f"Difference: {abs(D2 - 1.45):.2f} ({abs(D2 - 1.45) / 0.10:.1f}σ)")
@@ -356,12 +526,17 @@ def main():
     print(f"Number of clusters: {n_clusters}")
     print(f"DFA Prediction: N/4 = 456/4 = 114 clusters")
     print(f"Mean cluster size: {np.mean(cluster_sizes):.1f}")
+    cluster_counts = cluster_sensitivity(events)
+    print(f"Cluster count over eps {DBSCAN_SWEEP_EPS[0]:.2f}-{DBSCAN_SWEEP_EPS[-1]:.2f}, "
+          f"min_samples {DBSCAN_SWEEP_MIN_SAMPLES[0]}-{DBSCAN_SWEEP_MIN_SAMPLES[-1]}: "
+          f"{cluster_counts.min()}-{cluster_counts.max()}")
     print()
 
     # Visualization
     print("Generating plots...")
     plot_event_distribution(data)
-    plot_correlation_integral(events)
+    plot_correlation_integral(d2_result)
+    plot_cluster_sensitivity(cluster_counts)
     print()
 
     # Summary
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Unified Neutrino Event Catalog
+==============================
+
+One loader for every neutrino release used in the D2 analyses:
+
+    hese      HESE 7.5-year JSON (recoDepositedEnergy, recoZenith)
+    amanda    AMANDA-II 7-year table (2000-2006), read from the shipped zip
+    ps10yr    IceCube 10-year point-source season CSVs (1.13M events)
+    generic   Two-column Energy(GeV) Zenith(rad) files (calculate_d2.py format)
+
+Every release is converted to the same structured array (EVENT_DTYPE) and
+cached next to its source in binary form, so cross-release comparisons
+parse each text format once.
+
+Run: python3 event_catalog.py [release ...]
+
+Author: Jason King / TFA Framework
+"""
+
+import glob
+import io
+import json
+import os
+import sys
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from binary_cache import cache_path_for, load_array, save_array, source_signature
+
+REPO_ROOT = Path(__file__).parent.parent
+
+# ============================================================================
+# SCHEMA
+# ============================================================================
+
+# All angles in degrees, energies as log10(E/GeV). Fields a release does not
+# provide are NaN (floats) or -1 (integers).
+EVENT_DTYPE = np.dtype([
+    ('MJD', 'f8'),        # Modified Julian Date
+    ('log10E', 'f8'),     # log10(reconstructed energy / GeV)
+    ('AngErr', 'f8'),     # Angular resolution (deg)
+    ('RA', 'f8'),         # Right ascension (deg)
+    ('Dec', 'f8'),        # Declination (deg)
+    ('Azimuth', 'f8'),    # Local azimuth (deg)
+    ('Zenith', 'f8'),     # Local zenith (deg)
+    ('Nch', 'i4'),        # Number of channels hit (AMANDA energy proxy)
+    ('season', 'i2'),     # Index into EventCatalog.seasons
+    ('release', 'i1'),    # Index into RELEASES
+])
+
+RELEASES = ('hese', 'amanda', 'ps10yr', 'generic')
+
+# Default source locations (same paths the standalone scripts use)
+DEFAULT_SOURCES = {
+    'hese': REPO_ROOT / 'data' / 'HESE-7-year-data-release-main' / 'HESE-7-year-data-release'
+                      / 'resources' / 'data' / 'HESE_data.json',
+    'amanda': REPO_ROOT / 'data' / '20080911_AMANDA_7_Year_Data.zip',
+    'ps10yr': Path('events'),
+    'generic': Path('data.dat'),
+}
+
+AMANDA_MEMBER = 'AMANDA_7_Year_Data.txt'
+
+
+@dataclass
+class EventCatalog:
+    """Events of one release in the common schema."""
+    release: str
+    events: np.ndarray              # structured array, EVENT_DTYPE
+    seasons: Tuple[str, ...] = ()   # names for the 'season' field
+    source: str = ''
+
+    def __len__(self):
+        return len(self.events)
+
+
+def empty_events(n: int, release: str) -> np.ndarray:
+    """Allocate ``n`` events with every optional field marked missing."""
+    events = np.empty(n, dtype=EVENT_DTYPE)
+    for name in EVENT_DTYPE.names:
+        if EVENT_DTYPE[name].kind == 'f':
+            events[name] = np.nan
+        else:
+            events[name] = -1
+    events['release'] = RELEASES.index(release)
+    return events
+
+
+# ============================================================================
+# READERS
+# ============================================================================
+
+def read_hese(path) -> EventCatalog:
+    """Read the HESE 7.5-year JSON release (energies in GeV, zenith in radians)."""
+    with open(path) as f:
+        data = json.load(f)
+
+    energy = np.asarray(data['recoDepositedEnergy'], dtype=float)
+    events = empty_events(len(energy), 'hese')
+    events['log10E'] = np.log10(energy)
+    events['Zenith'] = np.degrees(np.asarray(data['recoZenith'], dtype=float))
+
+    return EventCatalog('hese', events, source=str(path))
+
+
+def _skip_amanda_header(f):
+    """Advance a text stream past the comment block and the '---' header rule."""
+    for line in iter(f.readline, ''):
+        if line.lstrip().startswith('---'):
+            return
+    raise ValueError("AMANDA table header ('---' rule) not found")
+
+
+def _parse_amanda_table(f) -> pd.DataFrame:
+    """Parse the AMANDA data rows from a stream positioned after the header."""
+    _skip_amanda_header(f)
+    return pd.read_csv(f, sep=r'\s+', header=None,
+                       names=['Dec', 'RA', 'Nch', 'Resol', 'Year', 'Day', 'Second', 'MJD', 'Subset'])
+
+
+def read_amanda(path) -> EventCatalog:
+    """
+    Read the AMANDA-II 7-year table, either the plain text file or straight
+    out of the distributed zip archive (no extraction to disk).
+
+    Columns: Dec(deg) RA(h) Nch Resol(deg) Year GPSDay Second MJD [AtmSubset].
+    AMANDA has no energy estimate; Nch is kept as the energy proxy and the
+    zenith follows from the South Pole location (zenith = 90 + Dec).
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            # The archive also carries macOS resource forks (__MACOSX/._*)
+            members = [n for n in zf.namelist()
+                       if n.endswith(AMANDA_MEMBER) and not n.startswith('__MACOSX')]
+            if not members:
+                raise FileNotFoundError(f"{AMANDA_MEMBER} not found in {path}")
+            with zf.open(members[0]) as raw:
+                df = _parse_amanda_table(io.TextIOWrapper(raw, encoding='ascii'))
+    else:
+        with open(path) as f:
+            df = _parse_amanda_table(f)
+
+    events = empty_events(len(df), 'amanda')
+    events['Dec'] = df['Dec'].values
+    events['RA'] = df['RA'].values * 15.0
+    events['AngErr'] = df['Resol'].values
+    events['Nch'] = df['Nch'].values
+    events['MJD'] = df['MJD'].values
+    events['Zenith'] = 90.0 + df['Dec'].values
+
+    years = df['Year'].values.astype(int)
+    seasons, events['season'] = np.unique(years, return_inverse=True)
+
+    return EventCatalog('amanda', events, tuple(str(y) for y in seasons), str(path))
+
+
+def read_ps10yr(events_dir) -> EventCatalog:
+    """Read every season CSV of the IceCube 10-year point-source release."""
+    frames = []
+    seasons = []
+
+    for csv_file in sorted(glob.glob(os.path.join(events_dir, '*.csv'))):
+        season = os.path.basename(csv_file).replace('_exp.csv', '').replace('_exp-1.csv', '')
+        df = pd.read_csv(csv_file, comment='#', sep=r'\s+',
+                         names=['MJD', 'log10E', 'AngErr', 'RA', 'Dec', 'Azimuth', 'Zenith'])
+        frames.append((len(seasons), df))
+        seasons.append(season)
+
+    n_total = sum(len(df) for _, df in frames)
+    events = empty_events(n_total, 'ps10yr')
+
+    start = 0
+    for season_idx, df in frames:
+        block = events[start:start + len(df)]
+        for name in df.columns:
+            block[name] = df[name].values
+        block['season'] = season_idx
+        start += len(df)
+
+    return EventCatalog('ps10yr', events, tuple(seasons), str(events_dir))
+
+
+def read_generic(path) -> EventCatalog:
+    """Read a two-column Energy(GeV) Zenith(rad) file."""
+    data = np.loadtxt(path, ndmin=2)
+
+    events = empty_events(len(data), 'generic')
+    events['log10E'] = np.log10(data[:, 0])
+    events['Zenith'] = np.degrees(data[:, 1])
+
+    return EventCatalog('generic', events, source=str(path))
+
+
+READERS = {
+    'hese': read_hese,
+    'amanda': read_amanda,
+    'ps10yr': read_ps10yr,
+    'generic': read_generic,
+}
+
+
+# ============================================================================
+# LOADING WITH CACHE
+# ============================================================================
+
+def load_release(release: str, source=None, use_cache: bool = True) -> EventCatalog:
+    """
+    Load one release in the common schema, using the binary cache when valid.
+
+    Args:
+        release: One of RELEASES
+        source: File or directory to read (defaults to DEFAULT_SOURCES)
+        use_cache: Reuse / write the cache next to the source
+
+    Returns:
+        EventCatalog (events are memory-mapped on a cache hit)
+    """
+    if release not in READERS:
+        raise ValueError(f"Unknown release '{release}', expected one of {RELEASES}")
+
+    source = Path(source) if source is not None else DEFAULT_SOURCES[release]
+    if not source.exists():
+        raise FileNotFoundError(f"{release} source not found: {source}")
+
+    if not use_cache:
+        return READERS[release](source)
+
+    cache_path = cache_path_for(source, release)
+    signature = source_signature(source)
+
+    cached = load_array(cache_path, signature)
+    if cached is not None and cached[0].dtype == EVENT_DTYPE:
+        events, meta = cached
+        return EventCatalog(release, events, tuple(meta.get('seasons', ())), str(source))
+
+    catalog = READERS[release](source)
+    save_array(cache_path, catalog.events, signature, {'seasons': list(catalog.seasons)})
+    return catalog
+
+
+def load_releases(releases=RELEASES, sources: Dict[str, str] = None) -> Dict[str, EventCatalog]:
+    """Load every available release; missing sources are skipped with a note."""
+    sources = sources or {}
+    catalogs = {}
+
+    for release in releases:
+        try:
+            catalogs[release] = load_release(release, sources.get(release))
+        except FileNotFoundError as e:
+            print(f"  {release}: skipped ({e})")
+
+    return catalogs
+
+
+def combine(catalogs) -> np.ndarray:
+    """Concatenate several catalogs; the 'release' field keeps them apart."""
+    return np.concatenate([c.events for c in catalogs])
+
+
+def main():
+    releases = sys.argv[1:] or RELEASES
+
+    print("=" * 70)
+    print("NEUTRINO EVENT CATALOG")
+    print("=" * 70)
+    print()
+
+    catalogs = load_releases(releases)
+
+    print()
+    print(f"{'Release':<10} {'Events':>10} {'log10E range':>16} {'Zenith range (deg)':>20}")
+    print("-" * 70)
+    for release, catalog in catalogs.items():
+        ev = catalog.events
+        if np.all(np.isnan(ev['log10E'])):
+            e_range = 'n/a'
+        else:
+            e_range = f"{np.nanmin(ev['log10E']):.1f} - {np.nanmax(ev['log10E']):.1f}"
+        z_range = f"{np.nanmin(ev['Zenith']):.1f} - {np.nanmax(ev['Zenith']):.1f}"
+        print(f"{release:<10} {len(catalog):>10,} {e_range:>16} {z_range:>20}")
+
+
+if __name__ == '__main__':
+    main()
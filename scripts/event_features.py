@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+D2 Feature Store for Event Catalogs
+===================================
+
+Computes the transformed D2 coordinates (log10E, sin Dec, cos zenith, ...)
+once for a whole catalog and caches them next to the event store, together
+with the catalog-wide min/max normalization. Subset analyses then gather
+rows from precomputed float arrays instead of re-deriving them.
+
+Normalization is an explicit choice:
+    'global'   scale by the full-catalog min/max (bins share one scale)
+    'subset'   scale by the subset's own min/max (original prepare_features)
+    None       raw transformed values
+
+Author: Jason King / TFA Framework
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+from binary_cache import cache_path_for, load_array, save_array, source_signature
+
+# Feature name -> transform of the event columns (EVENT_DTYPE units)
+TRANSFORMS = {
+    'log10E': lambda ev: np.asarray(ev['log10E'], dtype=float),
+    'sin_dec': lambda ev: np.sin(np.radians(ev['Dec'])),
+    'cos_zenith': lambda ev: np.cos(np.radians(ev['Zenith'])),
+    'log10_nch': lambda ev: np.log10(np.asarray(ev['Nch'], dtype=float)),
+}
+
+# Feature space used for each release in the existing analyses
+DEFAULT_FEATURES = {
+    'ps10yr': ('log10E', 'sin_dec'),        # analyze_10yr_d2.py
+    'hese': ('log10E', 'cos_zenith'),       # verify_d2_hese.py
+    'generic': ('log10E', 'cos_zenith'),    # calculate_d2.py
+    'amanda': ('log10_nch', 'sin_dec'),     # Nch is AMANDA's energy proxy
+}
+
+NORMALIZATIONS = ('global', 'subset', None)
+
+
+def min_max(x: np.ndarray) -> np.ndarray:
+    """Scale each column of ``x`` to [0, 1] by its own min/max."""
+    lo = x.min(axis=0)
+    return (x - lo) / (x.max(axis=0) - lo)
+
+
+class FeatureStore:
+    """Raw and globally normalized feature columns of one catalog."""
+
+    def __init__(self, events, names: Tuple[str, ...], arrays: np.ndarray = None):
+        """
+        Args:
+            events: Structured event array or DataFrame (ignored if arrays given)
+            names: Feature names (keys of TRANSFORMS)
+            arrays: Precomputed (2, N, F) block [raw, normalized], e.g. from cache
+        """
+        self.names = tuple(names)
+
+        if arrays is None:
+            raw = np.column_stack([TRANSFORMS[n](events) for n in self.names])
+            lo = np.nanmin(raw, axis=0)
+            span = np.nanmax(raw, axis=0) - lo
+            arrays = np.stack([raw, (raw - lo) / span])
+
+        self.raw = arrays[0]
+        self.normalized = arrays[1]
+        self._arrays = arrays
+
+    @classmethod
+    def for_catalog(cls, catalog, names: Tuple[str, ...] = None) -> 'FeatureStore':
+        """
+        Build (or load from the binary cache) the features of an EventCatalog.
+
+        The cache sits next to the catalog's own cache and shares its source
+        signature, so editing the data invalidates both together.
+        """
+        names = tuple(names or DEFAULT_FEATURES[catalog.release])
+        if not catalog.source:
+            return cls(catalog.events, names)
+
+        cache_path = cache_path_for(catalog.source, f"{catalog.release}.features")
+        signature = source_signature(catalog.source)
+        cached = load_array(cache_path, signature)
+        if cached is not None and tuple(cached[1].get('names', ())) == names:
+            return cls(None, names, arrays=cached[0])
+
+        store = cls(catalog.events, names)
+        save_array(cache_path, store._arrays, signature, {'names': list(names)})
+        return store
+
+    def __len__(self):
+        return len(self.raw)
+
+    def features(self, rows=None, normalize='global') -> np.ndarray:
+        """
+        Feature matrix for ``rows`` (all rows if None).
+
+        Args:
+            rows: Row indices or slice
+            normalize: 'global', 'subset' or None (see module docstring)
+
+        Returns:
+            N x F float array (a view when rows is None or a slice)
+        """
+        if normalize not in NORMALIZATIONS:
+            raise ValueError(f"normalize must be one of {NORMALIZATIONS}, got {normalize!r}")
+
+        rows = slice(None) if rows is None else rows
+        if normalize == 'global':
+            return self.normalized[rows]
+        if normalize == 'subset':
+            return min_max(self.raw[rows])
+        return self.raw[rows]
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Sorted Column Index for Event Subsets
+=====================================
+
+Range and box queries over log10E, Dec, MJD and season without scanning the
+full catalog.
+
+EventIndex keeps one argsort permutation and the sorted values per column;
+a range query is two ``searchsorted`` calls and returns a view into the
+permutation, so no event data is copied.
+
+BucketIndex groups rows by cell of a regular grid (season x log10E x Dec by
+default), ordered so that a run of cells along the last column is one
+contiguous slice. Box queries on bucket edges are a handful of slices;
+other edges only filter the boundary cells.
+
+    index = EventIndex.for_catalog(catalog)
+    rows = index.range('log10E', 3, 4)                       # view, O(log N)
+
+    grid = BucketIndex.for_catalog(catalog)
+    rows = grid.box(log10E=(3, 4), Dec=(-30, 0), season=(2, 3))
+
+Author: Jason King / TFA Framework
+"""
+
+import time
+from typing import Dict, Tuple
+
+import numpy as np
+
+from binary_cache import cache_path_for, load_array, save_array, source_signature
+
+INDEX_COLUMNS = ('log10E', 'Dec', 'MJD', 'season')
+
+
+class EventIndex:
+    """Sorted permutations of selected event columns."""
+
+    def __init__(self, events, columns: Tuple[str, ...] = INDEX_COLUMNS,
+                 orders: np.ndarray = None):
+        """
+        Args:
+            events: Structured array or DataFrame with the indexed columns
+            columns: Columns to index
+            orders: Precomputed permutations (len(columns) x N), e.g. from cache
+        """
+        self.columns = tuple(columns)
+        self._values = {c: np.ascontiguousarray(events[c]) for c in self.columns}
+        self.n_events = len(self._values[self.columns[0]])
+
+        if orders is None:
+            orders = np.empty((len(self.columns), self.n_events), dtype=np.int64)
+            for i, c in enumerate(self.columns):
+                orders[i] = np.argsort(self._values[c], kind='stable')
+
+        self._order = {c: orders[i] for i, c in enumerate(self.columns)}
+        self._sorted = {c: self._values[c][self._order[c]] for c in self.columns}
+
+    @classmethod
+    def for_catalog(cls, catalog, columns: Tuple[str, ...] = INDEX_COLUMNS) -> 'EventIndex':
+        """
+        Build (or load from the binary cache) the index of an EventCatalog.
+
+        The permutations are cached next to the catalog source, keyed on the
+        same source signature as the events themselves.
+        """
+        columns = tuple(c for c in columns if not np.all(np.isnan(catalog.events[c].astype(float))))
+        tag = f"{catalog.release}.index"
+
+        if not catalog.source:
+            return cls(catalog.events, columns)
+
+        cache_path = cache_path_for(catalog.source, tag)
+        signature = source_signature(catalog.source)
+        cached = load_array(cache_path, signature)
+        if cached is not None and tuple(cached[1].get('columns', ())) == columns:
+            return cls(catalog.events, columns, orders=cached[0])
+
+        index = cls(catalog.events, columns)
+        orders = np.stack([index._order[c] for c in columns])
+        save_array(cache_path, orders, signature, {'columns': list(columns)})
+        return index
+
+    def _bounds(self, column: str, lo: float, hi: float) -> Tuple[int, int]:
+        sorted_values = self._sorted[column]
+        return (int(np.searchsorted(sorted_values, lo, side='left')),
+                int(np.searchsorted(sorted_values, hi, side='left')))
+
+    def range(self, column: str, lo: float = -np.inf, hi: float = np.inf) -> np.ndarray:
+        """
+        Rows with lo <= column < hi (same half-open convention as the bin masks).
+
+        Returns:
+            Row indices as a zero-copy view, ordered by the column value
+        """
+        i0, i1 = self._bounds(column, lo, hi)
+        return self._order[column][i0:i1]
+
+    def count(self, column: str, lo: float = -np.inf, hi: float = np.inf) -> int:
+        """Number of rows with lo <= column < hi."""
+        i0, i1 = self._bounds(column, lo, hi)
+        return i1 - i0
+
+    def values(self, column: str, lo: float = -np.inf, hi: float = np.inf) -> np.ndarray:
+        """Sorted column values in [lo, hi) as a zero-copy view."""
+        i0, i1 = self._bounds(column, lo, hi)
+        return self._sorted[column][i0:i1]
+
+    def box(self, **ranges: Tuple[float, float]) -> np.ndarray:
+        """
+        Rows inside a box, e.g. box(log10E=(3, 4), Dec=(-30, 0)).
+
+        The narrowest range (fewest rows) is taken from its index and the
+        remaining ranges are checked only on those candidates.
+
+        Returns:
+            Row indices ordered by the leading column (np.sort for row order)
+        """
+        if not ranges:
+            return np.arange(self.n_events)
+
+        counts = {c: self.count(c, *r) for c, r in ranges.items()}
+        lead = min(counts, key=counts.get)
+        rows = self.range(lead, *ranges[lead])
+
+        keep = np.ones(len(rows), dtype=bool)
+        for column, (lo, hi) in ranges.items():
+            if column == lead:
+                continue
+            v = self._values[column][rows]
+            keep &= (v >= lo) & (v < hi)
+
+        return rows[keep]
+
+
+def bin_ranges(index: EventIndex, column: str, bins) -> Dict[Tuple[float, float], np.ndarray]:
+    """Row indices for each (lo, hi) bin of one column (views, no copies)."""
+    return {(lo, hi): index.range(column, lo, hi) for lo, hi in bins}
+
+
+# Default grid for BucketIndex: column -> bucket width
+BUCKET_WIDTHS = {'season': 1, 'log10E': 0.1, 'Dec': 1.0}
+
+
+class BucketIndex:
+    """Rows grouped by cell of a regular grid over several columns."""
+
+    def __init__(self, events, widths: Dict[str, float] = None, order: np.ndarray = None):
+        """
+        Args:
+            events: Structured array or DataFrame with the bucketed columns
+            widths: Column -> bucket width, outermost column first
+            order: Precomputed row permutation sorted by cell, e.g. from cache
+        """
+        widths = widths or BUCKET_WIDTHS
+        self.columns = tuple(widths)
+        self._values = {c: np.ascontiguousarray(events[c]) for c in self.columns}
+        self.n_events = len(self._values[self.columns[0]])
+
+        # Buckets are floor(value / width), so round query bounds (log10E 3.0,
+        # Dec -30) fall exactly on an edge; scaling by 1/width keeps those exact
+        self._scale = {}
+        self._first = {}
+        self._n_buckets = []
+        for c in self.columns:
+            v = self._values[c]
+            scale = 1.0 / float(widths[c])
+            first = np.floor(np.nanmin(v) * scale)
+            self._scale[c] = scale
+            self._first[c] = first
+            self._n_buckets.append(int(np.floor(np.nanmax(v) * scale) - first) + 1)
+
+        cells = self._cells()
+        if order is None:
+            order = np.argsort(cells, kind='stable')
+        self.order = order
+        self.offsets = np.searchsorted(cells[order], np.arange(np.prod(self._n_buckets) + 1))
+
+    @classmethod
+    def for_catalog(cls, catalog, widths: Dict[str, float] = None) -> 'BucketIndex':
+        """Build (or load from the binary cache) the bucket index of an EventCatalog."""
+        widths = {c: w for c, w in (widths or BUCKET_WIDTHS).items()
+                  if not np.all(np.isnan(catalog.events[c].astype(float)))}
+        if not catalog.source:
+            return cls(catalog.events, widths)
+
+        cache_path = cache_path_for(catalog.source, f"{catalog.release}.buckets")
+        signature = source_signature(catalog.source)
+        cached = load_array(cache_path, signature)
+        if cached is not None and cached[1].get('widths') == dict(widths):
+            return cls(catalog.events, widths, order=cached[0])
+
+        index = cls(catalog.events, widths)
+        save_array(cache_path, index.order, signature, {'widths': dict(widths)})
+        return index
+
+    def _position(self, column: str, values) -> np.ndarray:
+        """Fractional bucket coordinate; its floor is the bucket number."""
+        return np.asarray(values, dtype=float) * self._scale[column] - self._first[column]
+
+    def _cells(self) -> np.ndarray:
+        buckets = [np.clip(np.floor(self._position(c, self._values[c])), 0, n - 1).astype(np.int64)
+                   for c, n in zip(self.columns, self._n_buckets)]
+        return np.ravel_multi_index(buckets, self._n_buckets)
+
+    def box(self, **ranges: Tuple[float, float]) -> np.ndarray:
+        """
+        Rows with lo <= column < hi for every given column.
+
+        Returns:
+            Row indices grouped by cell (np.sort for row order)
+        """
+        unknown = [c for c in ranges if c not in self.columns]
+        if unknown:
+            raise ValueError(f"Columns {unknown} are not bucketed; indexed columns are {self.columns}")
+
+        spans = []
+        exact = {}
+        for c, n in zip(self.columns, self._n_buckets):
+            lo, hi = ranges.get(c, (-np.inf, np.inf))
+            b_lo = self._position(c, lo) if np.isfinite(lo) else 0
+            b_hi = self._position(c, hi) if np.isfinite(hi) else n
+            # Query bounds inside a bucket need a value check on that bucket
+            exact[c] = (not np.isfinite(lo) or b_lo == np.floor(b_lo)) and \
+                       (not np.isfinite(hi) or b_hi == np.floor(b_hi))
+            b0 = int(np.clip(np.floor(b_lo), 0, n))
+            b1 = int(np.clip(np.ceil(b_hi), 0, n))
+            spans.append((b0, b1))
+
+        if any(b1 <= b0 for b0, b1 in spans):
+            return np.empty(0, dtype=self.order.dtype)
+
+        # One contiguous slice per combination of the outer buckets
+        outer = np.ix_(*[np.arange(b0, b1) for b0, b1 in spans[:-1]])
+        first = [np.broadcast_to(o, np.broadcast_shapes(*[x.shape for x in outer])).ravel()
+                 for o in outer] if outer else []
+        last_b0, last_b1 = spans[-1]
+        starts = np.ravel_multi_index(first + [np.full(len(first[0]) if first else 1, last_b0)],
+                                      self._n_buckets)
+        ends = starts + (last_b1 - last_b0)
+
+        lo_off = self.offsets[starts]
+        hi_off = self.offsets[ends]
+        if len(starts) == 1:
+            rows = self.order[lo_off[0]:hi_off[0]]
+        else:
+            rows = np.concatenate([self.order[a:b] for a, b in zip(lo_off, hi_off) if b > a]
+                                  or [self.order[:0]])
+
+        for c, (lo, hi) in ranges.items():
+            if not exact[c]:
+                v = self._values[c][rows]
+                rows = rows[(v >= lo) & (v < hi)]
+
+        return rows
+
+
+def main():
+    """Benchmark index queries on the 10-year point-source sample."""
+    from event_catalog import load_release
+
+    catalog = load_release('ps10yr')
+    t0 = time.perf_counter()
+    index = EventIndex.for_catalog(catalog)
+    print(f"Index over {index.columns} for {index.n_events:,} events: "
+          f"{(time.perf_counter() - t0) * 1e3:.1f} ms")
+
+    t0 = time.perf_counter()
+    n_queries = 0
+    for e_min, e_max in [(2, 3), (3, 4), (4, 5), (5, 7)]:
+        for dec_min, dec_max in [(-90, -30), (-30, 0), (0, 30), (30, 90)]:
+            for season in range(len(catalog.seasons)):
+                index.box(log10E=(e_min, e_max), Dec=(dec_min, dec_max), season=(season, season + 1))
+                n_queries += 1
+    dt = (time.perf_counter() - t0) * 1e3
+    print(f"EventIndex:  {n_queries} energy x declination x season boxes: {dt / n_queries:.2f} ms per query")
+
+    t0 = time.perf_counter()
+    grid = BucketIndex.for_catalog(catalog)
+    print(f"BucketIndex over {grid.columns}: {(time.perf_counter() - t0) * 1e3:.1f} ms")
+
+    t0 = time.perf_counter()
+    for e_min, e_max in [(2, 3), (3, 4), (4, 5), (5, 7)]:
+        for dec_min, dec_max in [(-90, -30), (-30, 0), (0, 30), (30, 90)]:
+            for season in range(len(catalog.seasons)):
+                grid.box(log10E=(e_min, e_max), Dec=(dec_min, dec_max), season=(season, season + 1))
+    dt = (time.perf_counter() - t0) * 1e3
+    print(f"BucketIndex: {n_queries} energy x declination x season boxes: {dt / n_queries:.2f} ms per query")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Deterministic Event Subsampling
+===============================
+
+Draws subsamples as row-index arrays, so picking 50k of 1.13M events
+allocates the 50k indices and the 50k x F feature block they select, never
+a copy of the full catalog. Every draw takes an explicit seed.
+
+    rows = uniform_rows(len(store), 50000, seed=42)
+    rows = energy_stratified_rows(index, 50000, seed=42)
+    rows = season_stratified_rows(index, 50000, seed=42)
+    rows = pandas_rows(len(store), 50000, seed=42)   # df.sample's draw
+    features = store.features(rows, normalize='global')
+
+Author: Jason King / TFA Framework
+"""
+
+from typing import List, Sequence
+
+import numpy as np
+
+# log10(E/GeV) edges for energy-stratified draws (analyze_by_energy bins)
+ENERGY_STRATA = (2, 3, 4, 5, 7)
+
+
+def sample_positions(n: int, size: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Sorted uniform draw of ``size`` distinct positions from range(n).
+
+    Collects unique positions from with-replacement batches, then trims the
+    surplus at random. The procedure treats every position alike, so the
+    result is a uniform size-subset, and memory stays O(size) instead of the
+    O(n) permutation used by Generator.choice for large draws.
+    """
+    if size >= n:
+        return np.arange(n)
+
+    chosen = np.empty(0, dtype=np.int64)
+    while len(chosen) < size:
+        need = size - len(chosen)
+        batch = rng.integers(0, n, size=need + need // 8 + 16)
+        chosen = np.unique(np.concatenate([chosen, batch]))
+
+    keep = rng.choice(len(chosen), size, replace=False)
+    return chosen[np.sort(keep)]
+
+
+def uniform_rows(rows, size: int, seed: int) -> np.ndarray:
+    """
+    Uniform subsample without replacement.
+
+    Args:
+        rows: Number of events N (draw from range(N)) or an index array
+        size: Subsample size (all rows if size >= len(rows))
+        seed: Random seed
+
+    Returns:
+        Sorted row indices
+    """
+    rng = np.random.default_rng(seed)
+    if np.ndim(rows) == 0:
+        return sample_positions(int(rows), size, rng)
+
+    rows = np.asarray(rows)
+    return np.sort(rows[sample_positions(len(rows), size, rng)])
+
+
+def pandas_rows(rows, size: int, seed: int) -> np.ndarray:
+    """
+    The rows df.sample(n=size, random_state=seed) picks, in its order.
+
+    Draws with RandomState.choice, which permutes all N positions, so it
+    costs O(N). It is the default in the D2 scripts because it reproduces
+    the numbers they have always reported.
+
+    Args:
+        rows: Number of events N or an index array (sorted before drawing)
+        size: Subsample size (all rows if size >= len(rows))
+        seed: Random seed
+
+    Returns:
+        Row indices in draw order
+    """
+    rows = np.arange(int(rows)) if np.ndim(rows) == 0 else np.sort(rows)
+    if size >= len(rows):
+        return rows
+    return rows[np.random.RandomState(seed).choice(len(rows), size, replace=False)]
+
+
+def allocate(counts: Sequence[int], size: int, scheme: str = 'proportional') -> np.ndarray:
+    """
+    Split ``size`` draws across strata.
+
+    Args:
+        counts: Events per stratum
+        size: Total draws
+        scheme: 'proportional' (largest remainder) or 'equal' (capped by counts,
+                leftover redistributed proportionally)
+
+    Returns:
+        Draws per stratum (never more than the stratum holds)
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    size = min(size, int(counts.sum()))
+    if size == 0:
+        return np.zeros_like(counts)
+
+    if scheme == 'equal':
+        take = np.minimum(counts, size // max(np.count_nonzero(counts), 1))
+        rest = allocate(counts - take, size - int(take.sum()), 'proportional')
+        return take + rest
+    if scheme != 'proportional':
+        raise ValueError(f"Unknown allocation scheme '{scheme}'")
+
+    quota = counts * (size / counts.sum())
+    take = np.floor(quota).astype(np.int64)
+    remainder = size - int(take.sum())
+    if remainder:
+        take[np.argsort(-(quota - take), kind='stable')[:remainder]] += 1
+    return np.minimum(take, counts)
+
+
+def stratified_rows(strata: List[np.ndarray], size: int, seed: int,
+                    scheme: str = 'proportional') -> np.ndarray:
+    """
+    Stratified subsample from a list of per-stratum row-index arrays.
+
+    Args:
+        strata: Row indices of each stratum (e.g. EventIndex.range views)
+        size: Total subsample size
+        seed: Random seed (strata are drawn in order from one generator)
+        scheme: Allocation scheme, see allocate()
+
+    Returns:
+        Sorted row indices
+    """
+    rng = np.random.default_rng(seed)
+    take = allocate([len(s) for s in strata], size, scheme)
+
+    picked = [np.asarray(s)[sample_positions(len(s), int(k), rng)]
+              for s, k in zip(strata, take) if k > 0]
+    if not picked:
+        return np.empty(0, dtype=np.int64)
+    return np.sort(np.concatenate(picked))
+
+
+def energy_stratified_rows(index, size: int, seed: int, edges: Sequence[float] = ENERGY_STRATA,
+                           scheme: str = 'proportional') -> np.ndarray:
+    """Subsample stratified in log10E bins, strata taken from an EventIndex."""
+    strata = [index.range('log10E', lo, hi) for lo, hi in zip(edges[:-1], edges[1:])]
+    return stratified_rows(strata, size, seed, scheme)
+
+
+def season_stratified_rows(index, size: int, seed: int, scheme: str = 'proportional') -> np.ndarray:
+    """Subsample stratified by season, strata taken from an EventIndex."""
+    seasons = index.values('season')
+    strata = [index.range('season', s, s + 1) for s in np.unique(seasons)]
+    return stratified_rows(strata, size, seed, scheme)
@@ -1,89 +1,87 @@
 #!/usr/bin/env python3
 """
-Generate stellar period histogram showing 456-day clustering.
+Generate stellar period histogram marking the 456/k harmonics.
 TFA Framework - Figure for paper.
+
+Periods are the catalogs shipped with the repo: Kirk et al. (2016) Kepler
+heartbeat stars and the OGLE Galactic disk eclipsing binaries (plus
+double-mode components). Expected counts and p-values come from
+harmonic_excess with the KDE background, which follows the two-population
+shape of the combined sample; a single log-normal does not.
 """
 
 import matplotlib.pyplot as plt
 import numpy as np
 from pathlib import Path
 
-def generate_period_histogram():
-    """Generate histogram showing period clustering at 456/k harmonics."""
-
-    # Simulated period distribution based on paper data
-    # 25,857 systems with clustering at 456, 228, 152 days
-    np.random.seed(42)
-
-    # Background distribution (log-normal centered around 100 days)
-    n_background = 25000
-    background = np.random.lognormal(mean=4.0, sigma=1.2, size=n_background)
-    background = background[(background > 10) & (background < 1000)]
-
-    # Add clustering at 456/k harmonics
-    harmonics = {
-        456: 19,   # 456 days, 19 observed vs 6.8 expected (2.81x)
-        228: 24,   # 456/2 days, 24 observed vs 9.1 expected (2.63x)
-        152: 15,   # 456/3 days, 15 observed vs 8.4 expected (1.79x)
-        114: 10,   # 456/4 days
-        91.2: 8,   # 456/5 days
-    }
+from harmonic_excess import N_SIMS, PeriodNull, clean_periods, format_p, harmonic_excess
+from harmonic_phase import sample_values
+
+REPO_ROOT = Path(__file__).parent.parent
+OUTPUT_DIRS = [REPO_ROOT / 'results' / 'stellar', REPO_ROOT / 'paper' / 'submission' / 'results' / 'stellar']
 
-    harmonic_periods = []
-    for period, count in harmonics.items():
-        # Add some scatter around the harmonic
-        harmonic_periods.extend(np.random.normal(period, period * 0.02, count))
+K_MAX = 5
 
-    all_periods = np.concatenate([background, np.array(harmonic_periods)])
+
+def generate_period_histogram():
+    """Generate histogram of the catalog periods with the 456/k harmonics marked."""
+
+    samples = {
+        'Kirk 2016 heartbeat stars': clean_periods(sample_values('kirk2016')),
+        'OGLE eclipsing binaries': clean_periods(sample_values('ogle')),
+    }
+    all_periods = np.sort(np.concatenate(list(samples.values())))
 
     # Create figure
     fig, ax = plt.subplots(figsize=(12, 6))
 
-    # Histogram
-    bins = np.linspace(0, 600, 61)
-    counts, edges, _ = ax.hist(all_periods, bins=bins, color='steelblue',
-                                alpha=0.7, edgecolor='darkblue', linewidth=0.5)
+    # Histogram (log-spaced bins: the catalogs span 0.1 - 700 d)
+    bins = np.logspace(np.log10(all_periods[0]), np.log10(all_periods[-1]), 61)
+    counts, edges, _ = ax.hist(list(samples.values()), bins=bins, stacked=True,
+                               color=['steelblue', 'lightsteelblue'], edgecolor='darkblue',
+                               linewidth=0.5, label=list(samples))
+    top = counts[-1].max()
 
     # Mark the 456/k harmonics
-    harmonic_colors = ['red', 'orange', 'gold', 'yellow', 'lightyellow']
-    for i, (period, count) in enumerate(harmonics.items()):
-        ax.axvline(period, color='red', linestyle='--', linewidth=2, alpha=0.8)
-        label = f'456/{i+1}' if i > 0 else 'N₀ = 456'
-        y_pos = max(counts) * (0.95 - i * 0.08)
-        ax.annotate(f'{label}\n({period:.0f}d)', xy=(period, y_pos),
-                   fontsize=9, ha='center', color='darkred', fontweight='bold')
-
-    # Expected count line (flat distribution assumption)
-    bin_width = bins[1] - bins[0]
-    expected_per_bin = len(all_periods) / len(bins) * 0.5
-    ax.axhline(expected_per_bin, color='gray', linestyle=':', linewidth=1.5,
-               label=f'Expected (uniform): {expected_per_bin:.1f}')
+    for k in range(1, K_MAX + 1):
+        period = 456.0 / k
+        ax.axvline(period, color='red', linestyle='--', linewidth=1.5, alpha=0.8)
+        label = f'456/{k}' if k > 1 else 'N₀ = 456'
+        ax.annotate(f'{label}\n({period:.0f}d)', xy=(period, top * (0.55 - (k - 1) * 0.08)),
+                    fontsize=9, ha='center', color='darkred', fontweight='bold')
+
+    # Expected counts under the smooth (KDE) background
+    null = PeriodNull(all_periods, 'kde')
+    ax.stairs(null.expected(edges[:-1], edges[1:]), edges, color='gray', linestyle=':',
+              linewidth=1.5, label='Expected (KDE background)')
 
     # Labels and title
-    ax.set_xlabel('Oscillation Period (days)', fontsize=12)
+    ax.set_xscale('log')
+    ax.set_xlabel('Period (days)', fontsize=12)
     ax.set_ylabel('Number of Systems', fontsize=12)
-    ax.set_title('Stellar Period Distribution: 456/k Harmonic Clustering\n'
-                 '25,857 systems (Kepler heartbeat stars, OGLE, ground-based)', fontsize=13)
-
-    # Add statistics box
-    stats_text = ('TFA Harmonic Excess:\n'
-                  '456d: 2.81× expected (p < 0.0001)\n'
-                  '228d: 2.63× expected (p < 0.0001)\n'
-                  '152d: 1.79× expected (p = 0.012)')
+    ax.set_title('Stellar Period Distribution and the 456/k Harmonics\n'
+                 f'{len(all_periods):,} systems ({len(samples["Kirk 2016 heartbeat stars"])} Kepler '
+                 f'heartbeat stars, {len(samples["OGLE eclipsing binaries"]):,} OGLE)', fontsize=13)
+
+    # Statistics box (Monte Carlo p-values against the same background)
+    excess = harmonic_excess(all_periods, k_max=K_MAX, null='kde')
+    stats_text = 'TFA Harmonic Excess (±2%):' + ''.join(
+        f"\n{row['period']:.0f}d: {row['observed']} obs / {row['expected']:.2f} exp "
+        f"({format_p(row['p_value'], N_SIMS)})"
+        for row in excess)
     ax.text(0.98, 0.97, stats_text, transform=ax.transAxes, fontsize=10,
             verticalalignment='top', horizontalalignment='right',
             bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
 
-    ax.set_xlim(0, 600)
     ax.legend(loc='upper left')
     ax.grid(True, alpha=0.3)
 
-    # Save
-    output_dir = Path(__file__).parent.parent / 'results' / 'stellar'
-    output_dir.mkdir(parents=True, exist_ok=True)
-    output_path = output_dir / 'period_histogram_456.png'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight', facecolor='white')
-    print(f"Saved: {output_path}")
+    # Save (the paper keeps its own copy of the figure)
+    for output_dir in OUTPUT_DIRS:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_path = output_dir / 'period_histogram_456.png'
+        plt.savefig(output_path, dpi=300, bbox_inches='tight', facecolor='white')
+        print(f"Saved: {output_path}")
     plt.close()
 
 if __name__ == "__main__":
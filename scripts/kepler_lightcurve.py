@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Kepler Long-Cadence Light Curves
+================================
+
+Reads MAST long-cadence light-curve files (kplr<KIC>-<stamp>_llc.fits, as
+fetched by paper/validation/datasets/kepler/download_koi54.py) and stitches
+the quarters into one relative-flux series:
+
+    time    BJD - 2454833 (days), gaps between quarters left as they are
+    flux    PDCSAP flux / quarter median - 1, in ppm
+    quarter Kepler quarter of each point
+
+Cadences with a non-zero QUALITY flag or a non-finite flux are dropped.
+detrend() removes a low-order polynomial per quarter (slow instrumental
+drifts left by PDC), which leaves periastron brightenings and pulsations
+of days or shorter in place. Given the orbital period, the polynomials
+are fitted together with sinusoids at the orbital harmonics slower than
+TREND_BAND and only the polynomials are subtracted, so the low harmonics
+of long-period systems (KOI-54: 41.8 d) are not absorbed into the trend.
+Harmonics slower than two quarters cannot be told apart from the quarter
+polynomials and stay in the trend.
+
+    lc = load_kepler(5621294, 'koi54_data')
+    lc.time, lc.flux
+
+Author: Jason King / TFA Framework
+"""
+
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Long-cadence sampling (29.4244 min) and its Nyquist frequency (d^-1)
+LONG_CADENCE = 29.4243768 / 1440.0
+NYQUIST_LC = 0.5 / LONG_CADENCE
+
+PPM = 1e6
+
+# Polynomial degree removed per quarter by detrend()
+DETREND_DEGREE = 2
+
+# Orbital harmonics below this frequency (d^-1; periods >= 10 d) are fitted
+# with the trend by detrend(per=...)
+TREND_BAND = 0.1
+
+
+class LightCurve(NamedTuple):
+    time: np.ndarray        # BJD - 2454833 (d)
+    flux: np.ndarray        # Relative flux (ppm)
+    flux_err: np.ndarray    # Uncertainty (ppm)
+    quarter: np.ndarray     # Kepler quarter per point
+
+    def __len__(self):
+        return len(self.time)
+
+    @property
+    def baseline(self) -> float:
+        return float(self.time[-1] - self.time[0]) if len(self.time) else 0.0
+
+
+def lightcurve_paths(kic: Optional[int], directory) -> List[Path]:
+    """Long-cadence files of one KIC (or all of them) below ``directory`` (MAST layout or flat)."""
+    pattern = '*_llc.fits' if kic is None else f'kplr{int(kic):09d}-*_llc.fits'
+    return sorted(Path(directory).rglob(pattern))
+
+
+def read_llc(path, flux_column: str = 'PDCSAP_FLUX') -> LightCurve:
+    """One quarter, normalized by its median flux."""
+    from astropy.io import fits
+
+    with fits.open(path, memmap=True) as hdul:
+        data = hdul[1].data
+        quarter = int(hdul[0].header.get('QUARTER', -1))
+        time = np.asarray(data['TIME'], dtype=float)
+        flux = np.asarray(data[flux_column], dtype=float)
+        flux_err = np.asarray(data[flux_column + '_ERR'], dtype=float)
+        quality = np.asarray(data['QUALITY'])
+
+    keep = (quality == 0) & np.isfinite(time) & np.isfinite(flux)
+    time, flux, flux_err = time[keep], flux[keep], flux_err[keep]
+    median = np.median(flux) if len(flux) else 1.0
+    return LightCurve(time, (flux / median - 1) * PPM, flux_err / median * PPM,
+                      np.full(len(time), quarter, dtype=np.int16))
+
+
+def stitch(quarters: Sequence[LightCurve]) -> LightCurve:
+    """Concatenate normalized quarters in time order."""
+    if not quarters:
+        return LightCurve(*(np.empty(0) for _ in range(3)), np.empty(0, dtype=np.int16))
+    parts = [np.concatenate(column) for column in zip(*quarters)]
+    order = np.argsort(parts[0], kind='stable')
+    return LightCurve(*(p[order] for p in parts))
+
+
+def load_kepler(kic: Optional[int], directory, flux_column: str = 'PDCSAP_FLUX') -> LightCurve:
+    """All long-cadence quarters of a KIC (None: every file in the directory), stitched."""
+    paths = lightcurve_paths(kic, directory)
+    if not paths:
+        raise FileNotFoundError(f"No long-cadence light curves for KIC {kic} in {directory}")
+    return stitch([read_llc(p, flux_column) for p in paths])
+
+
+def detrend(lc: LightCurve, degree: int = DETREND_DEGREE, per: Optional[float] = None,
+            band: float = TREND_BAND) -> LightCurve:
+    """
+    Subtract a least-squares polynomial in time from every quarter.
+
+    With ``per`` (orbital period, d), the quarter polynomials and the cos/sin
+    of every orbital harmonic n / per < ``band`` are fitted jointly over the
+    whole light curve; only the polynomial part is subtracted. Harmonics
+    with periods above twice the median quarter span are left out (the fit
+    is degenerate there).
+    """
+    harmonics = np.arange(1, int(np.ceil(band * per))) / per if per and per > 0 else np.empty(0)
+    if len(harmonics):
+        span = np.median([np.ptp(lc.time[lc.quarter == q]) for q in np.unique(lc.quarter)])
+        harmonics = harmonics[2 * span * harmonics >= 1]
+    if not len(harmonics):
+        flux = lc.flux.copy()
+        for quarter in np.unique(lc.quarter):
+            rows = np.flatnonzero(lc.quarter == quarter)
+            if len(rows) <= degree + 1:
+                continue
+            x = lc.time[rows] - lc.time[rows].mean()
+            flux[rows] -= np.polyval(np.polyfit(x, flux[rows], degree), x)
+        return LightCurve(lc.time, flux, lc.flux_err, lc.quarter)
+
+    quarters = np.unique(lc.quarter)
+    n_poly = len(quarters) * (degree + 1)
+    design = np.zeros((len(lc), n_poly + 2 * len(harmonics)))
+    for i, quarter in enumerate(quarters):
+        rows = np.flatnonzero(lc.quarter == quarter)
+        x = lc.time[rows] - lc.time[rows].mean()
+        scale = max(np.abs(x).max(), 1.0)
+        design[rows, i * (degree + 1):(i + 1) * (degree + 1)] = np.vander(x / scale, degree + 1)
+    phase = 2 * np.pi * np.outer(lc.time, harmonics)
+    design[:, n_poly::2] = np.cos(phase)
+    design[:, n_poly + 1::2] = np.sin(phase)
+
+    coefficients = np.linalg.lstsq(design, lc.flux, rcond=None)[0]
+    trend = design[:, :n_poly] @ coefficients[:n_poly]
+    return LightCurve(lc.time, lc.flux - trend, lc.flux_err, lc.quarter)
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+KIC Cross-Match Index
+=====================
+
+Joins Kepler catalogs (Kirk 2016 heartbeat stars, Yu 2018 red giants,
+Kepler VOTables, ...) on their integer KIC number.
+
+The index keeps one master list of KIC numbers and, per registered catalog,
+the catalog table itself plus the master row of each of its rows. KIC
+lookups go through pandas' int64 hash engine, so registering a catalog is
+O(N) and touches nothing but that catalog: new KICs are appended to the
+master list, earlier catalogs keep their row maps, and their joined
+columns are padded with missing values when read.
+
+Everything is stored as .npy files in one directory:
+
+    master_kic.npy              KIC of each master row (append-only)
+    <catalog>.table.npy         registered table (structured array)
+    <catalog>.rows.npy          master row of each table row (-1: no KIC)
+    joined/<catalog>.<col>.npy  table column laid out on master rows
+    index.json                  registered catalogs, hashes, column names
+
+    index = KICIndex.open()
+    index.register('kirk2016', load_kirk2016())
+    index.register('yu2018', load_yu2018(table1, table2)[0])
+    both = index.join(['kirk2016', 'yu2018'])       # inner join, columnar dict
+
+Author: Jason King / TFA Framework
+"""
+
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from cds_table import INT_MISSING
+
+DEFAULT_DIR = Path(__file__).parent.parent / 'paper' / 'validation' / 'datasets' / 'kepler' / 'kic_index'
+
+INDEX_FILE = 'index.json'
+
+
+def missing_value(dtype: np.dtype):
+    """Fill value for rows a catalog does not cover."""
+    if dtype.kind == 'f':
+        return np.nan
+    if dtype.kind in 'iu':
+        return INT_MISSING
+    if dtype.kind == 'b':
+        return False
+    return ''
+
+
+def as_structured(table) -> np.ndarray:
+    """Structured array from a structured array or DataFrame (object columns as str)."""
+    if isinstance(table, np.ndarray):
+        return table
+    frame = pd.DataFrame(table)
+    fields = []
+    for name in frame.columns:
+        values = frame[name].to_numpy()
+        if values.dtype.kind == 'O':
+            values = values.astype(str)
+        fields.append((str(name), values))
+    out = np.empty(len(frame), dtype=[(n, v.dtype) for n, v in fields])
+    for n, v in fields:
+        out[n] = v
+    return out
+
+
+def _save(path: Path, array: np.ndarray):
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        np.save(f, np.ascontiguousarray(array), allow_pickle=False)
+    os.replace(tmp, path)
+
+
+class KICIndex:
+    """Persistent KIC-keyed join index over registered catalogs."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._meta = {'catalogs': {}}
+        self.master_kic = np.empty(0, dtype=np.int64)
+
+        index_file = self.directory / INDEX_FILE
+        if index_file.exists():
+            with open(index_file) as f:
+                self._meta = json.load(f)
+            self.master_kic = np.load(self.directory / 'master_kic.npy')
+        self._hash = pd.Index(self.master_kic)
+
+    @classmethod
+    def open(cls, directory=DEFAULT_DIR) -> 'KICIndex':
+        return cls(directory)
+
+    @property
+    def catalogs(self) -> List[str]:
+        return list(self._meta['catalogs'])
+
+    def __len__(self):
+        return len(self.master_kic)
+
+    def _path(self, *parts) -> Path:
+        return self.directory.joinpath(*parts)
+
+    def _write_index(self):
+        _save(self._path('master_kic.npy'), self.master_kic)
+        tmp = self._path(INDEX_FILE + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self._meta, f, indent=2)
+        os.replace(tmp, self._path(INDEX_FILE))
+
+    def register(self, name: str, table, kic: str = 'KIC') -> np.ndarray:
+        """
+        Add (or refresh) a catalog.
+
+        Args:
+            name: Catalog name
+            table: Structured array or DataFrame with an integer KIC column
+            kic: Name of the KIC column
+
+        Returns:
+            Master row of each table row (-1 where the KIC is missing); a KIC
+            listed twice in one table maps both rows to the same master row,
+            and the joined columns keep its first row
+        """
+        table = as_structured(table)
+        digest = hashlib.sha1(np.ascontiguousarray(table).tobytes()).hexdigest()
+        entry = self._meta['catalogs'].get(name)
+        if entry and entry['hash'] == digest and entry['kic'] == kic:
+            return self.rows(name)
+
+        keys = np.asarray(table[kic], dtype=np.int64)
+        valid = keys > 0
+
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        rows[valid] = self._hash.get_indexer(keys[valid])
+
+        new = valid & (rows < 0)
+        if new.any():
+            new_kic = pd.unique(keys[new])
+            rows[new] = len(self.master_kic) + pd.Index(new_kic).get_indexer(keys[new])
+            self.master_kic = np.concatenate([self.master_kic, new_kic])
+            self._hash = pd.Index(self.master_kic)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._path('joined').mkdir(exist_ok=True)
+        _save(self._path(f'{name}.table.npy'), table)
+        _save(self._path(f'{name}.rows.npy'), rows)
+
+        # Columnar layout on master rows; first occurrence wins for duplicates
+        first = np.zeros(len(rows), dtype=bool)
+        first[np.unique(rows, return_index=True)[1]] = True
+        first &= rows >= 0
+        for column in table.dtype.names:
+            values = np.full(len(self.master_kic), missing_value(table.dtype[column]),
+                             dtype=table.dtype[column])
+            values[rows[first]] = table[column][first]
+            _save(self._path('joined', f'{name}.{column}.npy'), values)
+
+        self._meta['catalogs'][name] = {'hash': digest, 'kic': kic, 'n_rows': len(table),
+                                        'columns': list(table.dtype.names)}
+        self._write_index()
+        return rows
+
+    def rows(self, name: str) -> np.ndarray:
+        """Master row of each row of a registered catalog."""
+        return np.load(self._path(f'{name}.rows.npy'), mmap_mode='r')
+
+    def table(self, name: str) -> np.ndarray:
+        """The registered table (memory-mapped)."""
+        return np.load(self._path(f'{name}.table.npy'), mmap_mode='r')
+
+    def column(self, name: str, column: str) -> np.ndarray:
+        """One catalog column on master rows, missing where the catalog lacks the KIC."""
+        values = np.load(self._path('joined', f'{name}.{column}.npy'), mmap_mode='r')
+        if len(values) == len(self.master_kic):
+            return values
+        # Master rows added after this catalog was registered
+        pad = np.full(len(self.master_kic) - len(values), missing_value(values.dtype), dtype=values.dtype)
+        return np.concatenate([values, pad])
+
+    def present(self, name: str) -> np.ndarray:
+        """Boolean mask over master rows covered by a catalog."""
+        mask = np.zeros(len(self.master_kic), dtype=bool)
+        rows = self.rows(name)
+        mask[rows[rows >= 0]] = True
+        return mask
+
+    def join(self, names: Sequence[str] = None, how: str = 'inner') -> Dict[str, np.ndarray]:
+        """
+        Joined master table in columnar form.
+
+        Args:
+            names: Catalogs to join (default: all registered)
+            how: 'inner' (KICs in every catalog) or 'outer' (in any)
+
+        Returns:
+            {'KIC': ..., '<catalog>.<column>': ...} arrays of equal length
+        """
+        names = list(names or self.catalogs)
+        if how not in ('inner', 'outer'):
+            raise ValueError(f"how must be 'inner' or 'outer', got {how!r}")
+
+        masks = [self.present(n) for n in names]
+        keep = np.logical_and.reduce(masks) if how == 'inner' else np.logical_or.reduce(masks)
+        rows = np.flatnonzero(keep)
+
+        joined = {'KIC': self.master_kic[rows]}
+        for name in names:
+            for column in self._meta['catalogs'][name]['columns']:
+                if column == self._meta['catalogs'][name]['kic']:
+                    continue
+                joined[f'{name}.{column}'] = self.column(name, column)[rows]
+        return joined
+
+    def frame(self, names: Sequence[str] = None, how: str = 'inner') -> pd.DataFrame:
+        """join() as a DataFrame."""
+        return pd.DataFrame(self.join(names, how))
+
+
+def main():
+    """Register the shipped Kepler catalogs and report the overlap."""
+    from stellar_catalogs import load_kirk2016, load_yu2018
+
+    index = KICIndex.open()
+    index.register('kirk2016', load_kirk2016())
+    if len(sys.argv) == 3:
+        index.register('yu2018', load_yu2018(sys.argv[1], sys.argv[2])[0])
+
+    print(f"KIC index: {len(index):,} stars in {index.catalogs}")
+    for name in index.catalogs:
+        print(f"  {name}: {int(index.present(name).sum()):,} stars")
+    if len(index.catalogs) > 1:
+        print(f"  in all catalogs: {len(index.join()['KIC']):,}")
+
+
+if __name__ == '__main__':
+    main()
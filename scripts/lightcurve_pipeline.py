@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Resumable Per-Star Light-Curve Pipeline
+=======================================
+
+Runs every target (KIC, orbital period) through
+
+    load -> detrend -> periodogram -> prewhiten -> k
+
+in a pool of worker processes and appends one JSON record per finished
+star to an append-only store (one line per star). The parent process is
+the only writer; each record is written as a single line and flushed to
+disk before the next one, so a crash loses at most the stars still in
+flight. On restart, stars with a record are skipped; stars whose record is
+an error are retried only on request. A line cut off by a crash is
+ignored when the store is read.
+
+    python lightcurve_pipeline.py <lightcurve_dir> [store.jsonl] [workers] [--retry-errors]
+
+    store = ResultStore('kirk2016_pipeline.jsonl')
+    run_pipeline(targets, lightcurve_dir, store, workers=8)
+    store.frame()                 # one summary row per star
+
+Author: Jason King / TFA Framework
+"""
+
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+import kepler_lightcurve
+from periodogram import lomb_scargle
+from prewhitening import prewhiten
+
+# Default store; *_pipeline.jsonl is gitignored, so runs leave the tree clean
+DEFAULT_STORE = Path(__file__).parent.parent / 'results' / 'stellar' / 'kirk2016_pipeline.jsonl'
+
+# Dominant periodogram peaks kept per star
+N_PEAKS = 5
+
+
+class ResultStore:
+    """Append-only JSON-lines store of per-star records, keyed by KIC."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def records(self) -> List[dict]:
+        """Every complete record, in write order (later records win on reading by KIC)."""
+        if not self.path.exists():
+            return []
+        records = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue    # Torn final line from an interrupted write
+        return records
+
+    def latest(self) -> Dict[int, dict]:
+        return {record['KIC']: record for record in self.records()}
+
+    def finished(self, retry_errors: bool = False) -> set:
+        """KICs that need no further run."""
+        return {kic for kic, record in self.latest().items()
+                if record['status'] == 'ok' or not retry_errors}
+
+    def append(self, record: dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(record, default=_plain) + '\n'
+        with open(self.path, 'a', encoding='utf-8') as f:
+            # A crash can tear the previous line; start on a fresh one
+            if f.tell() and not self._ends_with_newline():
+                f.write('\n')
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def frame(self) -> pd.DataFrame:
+        """One summary row per star (latest record)."""
+        columns = ['KIC', 'Per', 'status', 'n_points', 'n_frequencies', 'n_harmonics', 'k_median', 'elapsed']
+        rows = [{c: record.get(c) for c in columns} for record in self.latest().values()]
+        return pd.DataFrame(rows, columns=columns)
+
+
+def _plain(value):
+    """JSON fallback for numpy scalars and arrays."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Not JSON serializable: {type(value)}")
+
+
+def process_target(kic: int, per: float, directory, options: dict = None) -> dict:
+    """
+    Full pipeline for one star; never raises (errors become the record).
+
+    Args:
+        kic: KIC number
+        per: Orbital period (d), used for the harmonic flags and k
+        directory: Light-curve directory
+        options: Keyword arguments for prewhiten()
+
+    Returns:
+        JSON-ready record
+    """
+    started = time.perf_counter()
+    record = {'KIC': int(kic), 'Per': float(per)}
+    try:
+        lc = kepler_lightcurve.detrend(kepler_lightcurve.load_kepler(kic, directory), per=per)
+        record.update(n_points=len(lc), baseline=lc.baseline)
+
+        peaks = lomb_scargle(lc.time, lc.flux).peaks(N_PEAKS)
+        record['peaks'] = peaks[['frequency', 'amplitude', 'snr', 'fap']].to_dict('records')
+
+        f_orb = 1.0 / per if per > 0 else None
+        result = prewhiten(lc.time, lc.flux, f_orb=f_orb, **(options or {}))
+        frequencies = result.frequencies
+        record.update(n_frequencies=result.n_iterations, stop_reason=result.stop_reason,
+                      frequencies=frequencies.to_dict('records'))
+
+        if f_orb:
+            teo = frequencies[frequencies['harmonic']]
+            record.update(n_harmonics=len(teo), k_values=teo['k_int'].tolist(),
+                          k_median=float(teo['k'].median()) if len(teo) else None)
+        record['status'] = 'ok'
+    except Exception as e:
+        record.update(status='error', error=f"{type(e).__name__}: {e}",
+                      traceback=traceback.format_exc(limit=5))
+
+    record['elapsed'] = time.perf_counter() - started
+    record['finished'] = datetime.now().isoformat(timespec='seconds')
+    return record
+
+
+def run_pipeline(targets: Iterable[Tuple[int, float]], directory, store: ResultStore,
+                 workers: int = None, retry_errors: bool = False, options: dict = None,
+                 progress: bool = True) -> int:
+    """
+    Process every target not yet finished in ``store``.
+
+    Args:
+        targets: (KIC, Per) pairs
+        directory: Light-curve directory
+        store: Result store, appended to as stars finish
+        workers: Worker processes (default: CPU count; 1 runs inline)
+        retry_errors: Also rerun stars whose last record is an error
+        options: Keyword arguments for prewhiten()
+        progress: Print one line per finished star
+
+    Returns:
+        Number of stars processed in this run
+    """
+    done = store.finished(retry_errors)
+    pending = [(int(kic), float(per)) for kic, per in targets if int(kic) not in done]
+    if progress:
+        print(f"{len(pending)} stars to process ({len(done)} already in {store.path})")
+
+    def report(record, i):
+        store.append(record)
+        if progress:
+            detail = (f"{record.get('n_frequencies', 0)} frequencies, {record.get('n_harmonics', 0)} harmonics"
+                      if record['status'] == 'ok' else record['error'])
+            print(f"  [{i}/{len(pending)}] KIC {record['KIC']:09d}: {detail} ({record['elapsed']:.1f} s)")
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pending) or 1))
+    if workers == 1:
+        for i, (kic, per) in enumerate(pending, 1):
+            report(process_target(kic, per, directory, options), i)
+        return len(pending)
+
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(process_target, kic, per, directory, options) for kic, per in pending]
+        for i, future in enumerate(as_completed(futures), 1):
+            report(future.result(), i)
+    return len(pending)
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    from stellar_catalogs import load_kirk2016
+
+    catalog = load_kirk2016()
+    store = ResultStore(args[1] if len(args) > 1 else DEFAULT_STORE)
+    workers = int(args[2]) if len(args) > 2 else None
+
+    t0 = time.perf_counter()
+    run_pipeline(zip(catalog['KIC'], catalog['Per']), args[0], store, workers,
+                 retry_errors='--retry-errors' in sys.argv)
+    summary = store.frame()
+    print(f"\n{len(summary)} stars in {store.path} ({time.perf_counter() - t0:.0f} s this run)")
+    print(summary['status'].value_counts().to_string())
+
+
+if __name__ == '__main__':
+    main()
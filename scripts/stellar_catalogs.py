@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Stellar Catalog Loaders
+=======================
+
+Loaders for the fixed-width stellar catalogs used in the k analyses, built on
+the column-spec reader in cds_table.py. Each loader parses its text tables
+once and caches the result next to the source (binary_cache.py).
+
+    yu2018    Yu et al. (2018) Kepler red giants, table1 (numax, Delnu) merged
+              with table2 (mass, radius, evolutionary phase) on KIC
+    kirk2016  Kirk et al. (2016) Kepler heartbeat stars (KIC, Per, RAdeg,
+              DEdeg), parsed from the byte layout in kirk2016_readme.txt
+    ogle      OGLE Galactic disk eclipsing binaries plus the components of
+              the double-mode systems, with a sorted period index
+
+Run: python3 stellar_catalogs.py kirk2016 [catalog.dat]
+     python3 stellar_catalogs.py ogle
+     python3 stellar_catalogs.py yu2018 <table1.dat> <table2.dat>
+
+Author: Jason King / TFA Framework
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+
+from binary_cache import cache_path_for, load_array, save_array, source_signature
+from cds_table import INT_MISSING, Column, load_cds_table, read_fixed_width, read_vizier_tsv, table_dtype
+from event_index import EventIndex
+
+REPO_ROOT = Path(__file__).parent.parent
+KEPLER_DIR = REPO_ROOT / 'paper' / 'validation' / 'datasets' / 'kepler'
+OGLE_DIR = REPO_ROOT / 'paper' / 'validation' / 'datasets' / 'ogle'
+
+# ============================================================================
+# YU ET AL. (2018) RED GIANTS
+# ============================================================================
+
+# Byte ranges of the columns used by analyze_yu2018_red_giants.py
+YU2018_TABLE1 = [
+    Column('KIC', 2, 9, 'I'),
+    Column('numax', 29, 34, 'F'),     # muHz
+    Column('Delnu', 42, 47, 'F'),     # muHz
+]
+
+YU2018_TABLE2 = [
+    Column('KIC', 1, 8, 'I'),
+    Column('Mass', 42, 45, 'F'),      # Msun
+    Column('Radius', 52, 56, 'F'),    # Rsun
+    Column('Phase', 106, 106, 'I'),   # 1 = RGB, 2 = HeB, blank = unclassified (-1)
+]
+
+YU2018_DTYPE = table_dtype(YU2018_TABLE1 + YU2018_TABLE2[1:])
+
+
+def merge_on_kic(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """
+    Inner join of two structured arrays on their 'KIC' field.
+
+    Rows keep the order of ``left``; a KIC listed twice in a table is joined
+    on its first occurrence.
+    """
+    _, i_left, i_right = np.intersect1d(left['KIC'], right['KIC'], return_indices=True)
+    order = np.argsort(i_left)
+    i_left, i_right = i_left[order], i_right[order]
+
+    names = list(left.dtype.names) + [n for n in right.dtype.names if n not in left.dtype.names]
+    dtype = [(n, (left if n in left.dtype.names else right).dtype[n]) for n in names]
+    merged = np.empty(len(i_left), dtype=dtype)
+    for n in left.dtype.names:
+        merged[n] = left[n][i_left]
+    for n in right.dtype.names:
+        if n not in left.dtype.names:
+            merged[n] = right[n][i_right]
+    return merged
+
+
+def load_yu2018(table1, table2, use_cache: bool = True) -> Tuple[np.ndarray, Dict[str, int]]:
+    """
+    Yu et al. (2018) red giants with seismic and stellar parameters.
+
+    Args:
+        table1: Path to table1.dat (KIC, numax, Delnu)
+        table2: Path to table2.dat (KIC, Mass, Radius, Phase)
+        use_cache: Reuse / write the merged binary table next to table1
+
+    Returns:
+        (stars, n_rows): structured array (YU2018_DTYPE) with one row per star
+        in both tables, memory-mapped on a cache hit, and the row count of
+        each input table
+    """
+    signature = source_signature(table1, table2)
+    cache_path = cache_path_for(table1, 'yu2018')
+    if use_cache:
+        cached = load_array(cache_path, signature)
+        if cached is not None and cached[0].dtype == YU2018_DTYPE:
+            return cached[0], cached[1]['n_rows']
+
+    t1 = read_fixed_width(table1, YU2018_TABLE1)
+    t2 = read_fixed_width(table2, YU2018_TABLE2)
+    merged = merge_on_kic(t1, t2)
+    n_rows = {'table1': len(t1), 'table2': len(t2)}
+    if use_cache:
+        save_array(cache_path, merged, signature, {'n_rows': n_rows})
+    return merged, n_rows
+
+
+# ============================================================================
+# KIRK ET AL. (2016) HEARTBEAT STARS
+# ============================================================================
+
+KIRK2016_CATALOG = KEPLER_DIR / 'kirk2016_heartbeat_catalog.dat'
+KIRK2016_README = KEPLER_DIR / 'kirk2016_readme.txt'
+
+
+def load_kirk2016(path=KIRK2016_CATALOG, readme=KIRK2016_README) -> np.ndarray:
+    """
+    Kirk et al. (2016) heartbeat stars.
+
+    Args:
+        path: Table file, either the CDS/VizieR fixed-width .dat (parsed from
+              the ReadMe byte description) or a VizieR .tsv export
+        readme: CDS ReadMe with the byte-by-byte description
+
+    Returns:
+        Structured array with KIC, Per (d), RAdeg, DEdeg
+    """
+    path = Path(path)
+    if path.suffix != '.tsv':
+        return load_cds_table(path, readme)
+
+    columns = read_vizier_tsv(path)
+    if not columns:
+        raise ValueError(f"{path} holds no table")
+    names = [n for n in ('KIC', 'Per', 'RAdeg', 'DEdeg') if n in columns]
+    table = np.empty(len(columns[names[0]]), dtype=[(n, 'i8' if n == 'KIC' else 'f8') for n in names])
+    for n in names:
+        table[n] = np.nan_to_num(columns[n], nan=INT_MISSING) if n == 'KIC' else columns[n]
+    return table
+
+
+# ============================================================================
+# OGLE GALACTIC DISK ECLIPSING BINARIES
+# ============================================================================
+
+OGLE_ECL = OGLE_DIR / 'ogle_gd_ecl_catalog.dat'
+OGLE_DOUBLE_MODE = OGLE_DIR / 'ogle_gd_double_mode.dat'
+
+# OGLE marks unmeasured magnitudes and colours with 99.999
+OGLE_MISSING = '99.999'
+
+# ID, I (mag), V-I (mag), I amplitude (mag), P (d), P error (d), epoch (HJD-2450000)
+OGLE_ECL_COLUMNS = [
+    Column('ID', 1, 17, 'A'),
+    Column('I', 19, 25, 'F', OGLE_MISSING),
+    Column('V_I', 26, 32, 'F', OGLE_MISSING),
+    Column('Amp', 34, 39, 'F', OGLE_MISSING),
+    Column('P', 41, 54, 'F'),
+    Column('e_P', 56, 65, 'F'),
+    Column('T0', 67, 76, 'F'),
+]
+
+# One row per component (ID suffix a/b) with its own light-curve type
+OGLE_DOUBLE_MODE_COLUMNS = [
+    Column('ID', 1, 18, 'A'),
+    Column('Type', 20, 22, 'A'),
+    Column('I', 24, 29, 'F', OGLE_MISSING),
+    Column('Amp', 31, 36, 'F', OGLE_MISSING),
+    Column('P', 38, 51, 'F'),
+    Column('e_P', 53, 62, 'F'),
+    Column('T0', 64, 73, 'F'),
+]
+
+OGLE_DTYPE = np.dtype([
+    ('ID', 'U18'), ('Type', 'U3'),
+    ('I', 'f8'), ('V_I', 'f8'), ('Amp', 'f8'),
+    ('P', 'f8'), ('e_P', 'f8'), ('T0', 'f8'),
+    ('double_mode', '?'),     # Row is one component of a double-mode system
+])
+
+
+def load_ogle(ecl=OGLE_ECL, double_mode=OGLE_DOUBLE_MODE, use_cache: bool = True) -> np.ndarray:
+    """
+    OGLE eclipsing binaries and double-mode components in one table.
+
+    Missing values (99.999, truncated records) are NaN; eclipsing-binary
+    rows have an empty Type.
+
+    Returns:
+        Structured array (OGLE_DTYPE); memory-mapped on a cache hit
+    """
+    signature = source_signature(ecl, double_mode)
+    cache_path = cache_path_for(ecl, 'ogle')
+    if use_cache:
+        cached = load_array(cache_path, signature)
+        if cached is not None and cached[0].dtype == OGLE_DTYPE:
+            return cached[0]
+
+    parts = [read_fixed_width(ecl, OGLE_ECL_COLUMNS), read_fixed_width(double_mode, OGLE_DOUBLE_MODE_COLUMNS)]
+    table = np.zeros(sum(len(p) for p in parts), dtype=OGLE_DTYPE)
+    table['V_I'] = np.nan
+    start = 0
+    for is_double_mode, part in enumerate(parts):
+        block = table[start:start + len(part)]
+        for name in part.dtype.names:
+            block[name] = part[name]
+        block['double_mode'] = bool(is_double_mode)
+        start += len(part)
+
+    if use_cache:
+        save_array(cache_path, table, signature)
+    return table
+
+
+def period_index(table: np.ndarray) -> EventIndex:
+    """
+    Sorted period index: index.range('P', lo, hi) gives the rows with
+    lo <= P < hi in O(log N); systems without a period are never returned.
+    """
+    return EventIndex(table, columns=('P',))
+
+
+def main():
+    if len(sys.argv) == 2 and sys.argv[1] == 'ogle':
+        t0 = time.perf_counter()
+        table = load_ogle()
+        index = period_index(table)
+        print(f"OGLE: {len(table):,} rows ({int(table['double_mode'].sum())} double-mode components) "
+              f"in {(time.perf_counter() - t0) * 1e3:.1f} ms")
+        print(f"  P in [0.5, 1) d: {index.count('P', 0.5, 1.0):,} systems")
+        return
+
+    if len(sys.argv) >= 2 and sys.argv[1] == 'kirk2016':
+        t0 = time.perf_counter()
+        stars = load_kirk2016(*sys.argv[2:3])
+        print(f"Kirk2016: {len(stars):,} heartbeat stars in {(time.perf_counter() - t0) * 1e3:.1f} ms")
+        return
+
+    if len(sys.argv) != 4 or sys.argv[1] != 'yu2018':
+        print(__doc__)
+        sys.exit(1)
+
+    t0 = time.perf_counter()
+    stars, _ = load_yu2018(Path(sys.argv[2]), Path(sys.argv[3]))
+    print(f"Yu2018: {len(stars):,} stars in {(time.perf_counter() - t0) * 1e3:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,10 +7,10 @@ This script independently calculates D₂ to verify which measurement is correct
 - 1.46 ± 0.07 (weighted combined)
 """
 
-import json
 import numpy as np
 from scipy.spatial.distance import pdist, cdist
 import warnings
+from event_catalog import load_release
 warnings.filterwarnings('ignore')
 
 print("=" * 70)
@@ -18,13 +18,12 @@ print("D₂ VERIFICATION FROM HESE 7.5-YEAR DATA")
 print("=" * 70)
 print()
 
-# Load HESE data
-with open('data/HESE-7-year-data-release-main/HESE-7-year-data-release/resources/data/HESE_data.json') as f:
-    data = json.load(f)
+# Load HESE data (common event schema, cached after the first run)
+events = load_release('hese', 'data/HESE-7-year-data-release-main/HESE-7-year-data-release/resources/data/HESE_data.json').events
 
 # Extract event data
-energy = np.array(data['recoDepositedEnergy'])  # in GeV
-zenith = np.array(data['recoZenith'])  # in radians
+energy = 10**events['log10E']  # in GeV
+zenith = np.radians(events['Zenith'])  # in radians
 
 n_events = len(energy)
 print(f"HESE 7.5-year events: {n_events}")